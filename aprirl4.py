@@ -16,6 +16,10 @@ import html
 import sys
 import os
 import argparse
+from image_fetcher import get_default_fetcher
+from dom_index import collect_row_text
+from html_parsing import parse_html
+from slide_ir import RemainingRows
 # Standard slide dimensions in inches
 SLIDE_WIDTH_INCHES = 10
 SLIDE_HEIGHT_INCHES = 7.5
@@ -63,7 +67,7 @@ def add_banner_to_slide(slide, banner_url=None, title_height=Inches(1.4)):
         # Try to download and use the banner image from URL
         try:
             # Download the image with timeout
-            response = requests.get(banner_url, stream=True, timeout=15)
+            response = get_default_fetcher().fetch(banner_url, timeout=15)
             
             if response.status_code == 200:
                 # Create image from content
@@ -243,7 +247,7 @@ def html_to_pptx(html_content, output_filename="presentation.pptx", banner_url=N
     prs = Presentation()
     
     # Parse HTML content
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = parse_html(html_content)
     
     # Extract styles from the HTML
     
@@ -296,7 +300,7 @@ def process_standard_slide(slide, prs, slide_index, banner_url=None):
         p.alignment = PP_ALIGN.CENTER
     
     # Process the slide content - now passing prs and slide_index
-    process_standard_slide_content(slide, current_slide, prs, slide_index)
+    process_standard_slide_content(slide, current_slide, prs, slide_index, banner_url)
     add_footer(current_slide)
     # Clean up any lingering placeholders
     clean_slide_placeholders(current_slide)
@@ -382,7 +386,7 @@ def process_text_content(element, text_frame, css_rules, slide=None, prs=None, s
                 p.font.italic = True
 
 
-def handle_text_overflow(text, text_frame, slide, current_slide_index, prs):
+def handle_text_overflow(text, text_frame, slide, current_slide_index, prs, banner_url=None):
     """Break long text content across multiple slides with improved text wrapping"""
     # Use a more conservative character count to ensure text fits
     chars_per_slide = 600  # Even more conservative than before
@@ -392,6 +396,8 @@ def handle_text_overflow(text, text_frame, slide, current_slide_index, prs):
     
     current_chars = 0
     current_para_index = 0
+    # Whether any paragraphs had to go on continuation slides
+    continued = False
     
     # Add paragraphs until we hit the character limit
     while current_para_index < len(paragraphs):
@@ -408,7 +414,7 @@ def handle_text_overflow(text, text_frame, slide, current_slide_index, prs):
             next_slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank slide
             
             # First add the banner - MUST be first to ensure proper layering
-            add_banner_to_slide(slide, banner_url, Inches(1.5))
+            add_banner_to_slide(next_slide, banner_url, Inches(1.5))
             
             # Add a title indicating continuation
             title_shape = next_slide.shapes.add_textbox(
@@ -432,12 +438,13 @@ def handle_text_overflow(text, text_frame, slide, current_slide_index, prs):
             next_text_frame.margin_top = 0
             next_text_frame.margin_bottom = 0
             
-            # Recursively handle remaining paragraphs
-            remaining_paras = paragraphs[current_para_index:]
-            remaining_text = '\n'.join(remaining_paras)
-            handle_text_overflow(remaining_text, next_text_frame, next_slide, 
-                               current_slide_index+1, prs)
-            return True
+            # Carry on with the remaining paragraphs on the new slide
+            text_frame = next_text_frame
+            slide = next_slide
+            current_slide_index += 1
+            current_chars = 0
+            continued = True
+            continue
         
         # If we get here, we can add this paragraph to the current slide
         p = text_frame.add_paragraph()
@@ -446,49 +453,72 @@ def handle_text_overflow(text, text_frame, slide, current_slide_index, prs):
         current_chars += len(para_text)
         current_para_index += 1
     
-    return False
+    return continued
 
-def process_standard_slide_content(slide_html, current_slide, prs=None, slide_index=0):
-    """Process content for a standard slide layout with better content fitting"""
-    # Track vertical position for adding content
-    current_y = Inches(1.5)  # Start after title
-    
+def process_standard_slide_content(slide_html, current_slide, prs=None, slide_index=0, banner_url=None):
+    """
+    Process content for a standard slide layout with better content fitting
+
+    Rows that do not fit go on continuation slides. A cursor into the slide's
+    rows marks where each continuation picks up, so any number of them are
+    laid out in one pass without copying rows or recursing.
+    """
     # Calculate maximum content height
     max_y = Inches(SLIDE_HEIGHT_INCHES - 0.7 - FOOTER_HEIGHT_INCHES)
-
     
-    # Get overall text length to determine if we need overflow handling
-    full_text = slide_html.get_text().strip()
-    
-    # If the entire content is very long, handle it specially
-    if len(full_text) > 1000 and prs:  # Lower threshold for better content fit
-        content_shape = current_slide.shapes.add_textbox(
-            Inches(0.5), current_y, Inches(9), Inches(5)
-        )
-        content_frame = content_shape.text_frame
-        content_frame.word_wrap = True
-        content_frame.margin_left = 0
-        content_frame.margin_right = 0
-        content_frame.margin_top = 0
-        content_frame.margin_bottom = 0
-        
-        # Handle as overflow text
-        handle_text_overflow(full_text, content_frame, current_slide, slide_index, prs)
-        return
-    
-    # Find and process all row divs
+    # Find all row divs
     rows = slide_html.find_all('div', class_='row')
-    
-    # If no rows are found, process the slide content directly
-    if not rows:
-        content_shape = current_slide.shapes.add_textbox(
-            Inches(0.5), current_y, Inches(9), Inches(5)
-        )
-        content_frame = content_shape.text_frame
-        process_content(slide_html, content_frame, current_slide, current_y, prs, slide_index)
-    else:
+    # Title and text length of every tail of the rows, for the continuation slides
+    remaining = RemainingRowTags(rows)
+    # Index of the first row not laid out yet
+    start = 0
+    
+    while True:
+        # Track vertical position for adding content
+        current_y = Inches(1.5)  # Start after title
+        # Where the next continuation slide picks up (None once every row is placed)
+        next_start = None
+        
+        # Get overall text length to determine if we need overflow handling
+        if start == 0:
+            full_text = slide_html.get_text().strip()
+            text_length = len(full_text)
+            title_element = slide_html.find('h1') or slide_html.find('h2')
+        else:
+            full_text = None
+            text_length = remaining.text_length(start)
+            title_element = remaining.title(start)
+        
+        # If the entire content is very long, handle it specially
+        if text_length > 1000 and prs:  # Lower threshold for better content fit
+            if full_text is None:
+                full_text = remaining.text(start)
+            content_shape = current_slide.shapes.add_textbox(
+                Inches(0.5), current_y, Inches(9), Inches(5)
+            )
+            content_frame = content_shape.text_frame
+            content_frame.word_wrap = True
+            content_frame.margin_left = 0
+            content_frame.margin_right = 0
+            content_frame.margin_top = 0
+            content_frame.margin_bottom = 0
+            
+            # Handle as overflow text
+            handle_text_overflow(full_text, content_frame, current_slide, slide_index, prs, banner_url)
+            return
+        
+        # If no rows are found, process the slide content directly
+        if not rows:
+            content_shape = current_slide.shapes.add_textbox(
+                Inches(0.5), current_y, Inches(9), Inches(5)
+            )
+            content_frame = content_shape.text_frame
+            process_content(slide_html, content_frame, current_slide, current_y, prs, slide_index)
+            return
+        
         # Process each row with better spacing management
-        for i, row in enumerate(rows):
+        for i in range(start, len(rows)):
+            row = rows[i]
             # Check remaining space
             remaining_height = max_y - current_y
             if remaining_height < Inches(1.0) and i < len(rows) - 1:
@@ -497,9 +527,8 @@ def process_standard_slide_content(slide_html, current_slide, prs=None, slide_in
                 if prs:
                     next_slide = prs.slides.add_slide(prs.slide_layouts[6])
                     # First add the banner - MUST be first to ensure proper layering
-                    add_banner_to_slide(slide_html, banner_url, Inches(1.5))
+                    add_banner_to_slide(next_slide, banner_url, Inches(1.5))
                     # Add a title indicating continuation
-                    title_element = slide_html.find('h1') or slide_html.find('h2')
                     title_text = title_element.get_text().strip() if title_element else f"Slide {slide_index+1}"
                     
                     title_shape = next_slide.shapes.add_textbox(
@@ -514,23 +543,17 @@ def process_standard_slide_content(slide_html, current_slide, prs=None, slide_in
                     
                     # Process remaining rows on new slide
                     next_y = Inches(1.5)
-                    for next_row in rows[i:]:
+                    for continue_index in range(i, len(rows)):
+                        next_row = rows[continue_index]
                         # Calculate content height
                         row_height = estimate_row_height(next_row)
                         
                         # Check if it fits on the continuation slide
                         if next_y + row_height > Inches(SLIDE_HEIGHT_INCHES - 0.7):
                             # Still too much content, need another slide
-                            continue_index = rows.index(next_row)
                             if continue_index < len(rows) - 1:
-                                # Recursively handle remaining content
-                                remaining_rows_html = BeautifulSoup('<div></div>', 'html.parser').div
-                                for r in rows[continue_index:]:
-                                    remaining_rows_html.append(r.copy())
-                                
-                                process_standard_slide_content(
-                                    remaining_rows_html, next_slide, prs, slide_index+1
-                                )
+                                # The rest starts over at the top of this continuation slide
+                                next_start = continue_index
                                 break
                         
                         # Create a text frame for this row
@@ -580,9 +603,8 @@ def process_standard_slide_content(slide_html, current_slide, prs=None, slide_in
                 if prs:
                     next_slide = prs.slides.add_slide(prs.slide_layouts[6])
                     # First add the banner - MUST be first to ensure proper layering
-                    add_banner_to_slide(slide_html, banner_url, Inches(1.5))
+                    add_banner_to_slide(next_slide, banner_url, Inches(1.5))
                     # Add a title indicating continuation
-                    title_element = slide_html.find('h1') or slide_html.find('h2')
                     title_text = title_element.get_text().strip() if title_element else f"Slide {slide_index+1}"
                     
                     title_shape = next_slide.shapes.add_textbox(
@@ -595,15 +617,33 @@ def process_standard_slide_content(slide_html, current_slide, prs=None, slide_in
                     p.font.bold = True
                     p.font.size = Pt(18)
                     
-                    # Recursively process remaining rows on new slide
-                    remaining_rows_html = BeautifulSoup('<div></div>', 'html.parser').div
-                    for r in rows[i+1:]:
-                        remaining_rows_html.append(r.copy())
-                    
-                    process_standard_slide_content(
-                        remaining_rows_html, next_slide, prs, slide_index+1
-                    )
+                    # Process remaining rows on new slide
+                    next_start = i + 1
                 break
+        
+        if next_start is None:
+            return
+        
+        # Move the cursor on to the continuation slide
+        start = next_start
+        current_slide = next_slide
+        slide_index += 1
+
+
+class RemainingRowTags(RemainingRows):
+    """
+    RemainingRows over row divs of the soup instead of compiled rows
+
+    title() returns the h1 or h2 element rather than its text.
+    """
+
+    @staticmethod
+    def _row_text(row):
+        return row.get_text()
+
+    @staticmethod
+    def _first_header(row, tag, default=None):
+        return row.find(tag) or default
 
 
 # Two specific fixes for the HTML to PowerPoint converter:
@@ -744,14 +784,14 @@ def process_column_slide(slide_html, prs, slide_idx,banner_url=None):
     y_left = start_y
     if left_column:
         print(f"Processing left column with {len(left_column.find_all('div', class_='row'))} rows")
-        y_left = process_column_content(left_column, slide, left_x, y_left, col_width, slide_idx, prs)
+        y_left = process_column_content(left_column, slide, left_x, y_left, col_width, slide_idx, prs, banner_url)
         final_y_positions.append(y_left)
 
     # Process right column if it exists
     y_right = start_y
     if right_column:
         print(f"Processing right column with {len(right_column.find_all('div', class_='row'))} rows")
-        y_right = process_column_content(right_column, slide, right_x, y_right, col_width, slide_idx, prs)
+        y_right = process_column_content(right_column, slide, right_x, y_right, col_width, slide_idx, prs, banner_url)
         final_y_positions.append(y_right)
 
     # Determine the highest Y position after processing both columns
@@ -831,24 +871,8 @@ def process_standalone_row(row, slide, left_x, y_pos, width, slide_index, prs):
         img_tags = row.find_all('img')
         has_images = len(img_tags) > 0
         
-        # Extract text content
-        header_text = ""
-        for header in row.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-            header_text += header.get_text().strip() + " "
-        
-        paragraph_text = ""
-        for para in row.find_all('p'):
-            paragraph_text += para.get_text().strip() + " "
-        
-        # Extract any other text
-        other_text = ""
-        row_copy = BeautifulSoup(str(row), 'html.parser')
-        for tag in row_copy.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'img']):
-            tag.decompose()
-        
-        for element in row_copy.descendants:
-            if isinstance(element, str) and element.strip():
-                other_text += element.strip() + " "
+        # Extract header, paragraph and any other text in one walk of the row
+        header_text, paragraph_text, other_text = collect_row_text(row)
         
         combined_text = (header_text + " " + paragraph_text + " " + other_text).strip()
         has_text = bool(combined_text)
@@ -981,7 +1005,7 @@ def process_standalone_row(row, slide, left_x, y_pos, width, slide_index, prs):
                     img_url = img.get('src', '')
                     
                     if img_url:
-                        response = requests.get(img_url, stream=True, timeout=15)  # Increased timeout
+                        response = get_default_fetcher().fetch(img_url, timeout=15)  # Increased timeout
                         if response.status_code == 200:
                             img_bytes = BytesIO(response.content)
                             
@@ -1047,7 +1071,7 @@ def process_standalone_row(row, slide, left_x, y_pos, width, slide_index, prs):
     except Exception as row_error:
         print(f"Error processing standalone row: {row_error}")
         return y_pos + Inches(0.5)  # Default return if error occurs
-def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, prs=None):
+def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, prs=None, banner_url=None):
     """Process content of a column with proper handling of rows and images"""
     current_y = y_pos
     
@@ -1056,8 +1080,15 @@ def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, pr
         rows = column.find_all('div', class_='row')
         print(f"Processing column content with {len(rows)} rows")
         
+        # Where the column ends on the original slide, once rows have moved on to continuations
+        first_slide_y = None
+        # Index of the row the current continuation slide started with
+        continued_from = None
+        # Titles for continuation slides, found for every tail of the rows at once
+        remaining = RemainingRowTags(rows)
+        
         # Process each row in the column
-        for row in rows:
+        for row_index, row in enumerate(rows):
             try:
                 # Check remaining space on slide
                 #remaining_height = Inches(SLIDE_HEIGHT_INCHES - 1.0 - FOOTER_HEIGHT_INCHES) - current_y
@@ -1074,7 +1105,10 @@ def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, pr
                     add_banner_to_slide(next_slide, banner_url, Inches(1.4))
                     
                     # Add continuation title
-                    title_element = column.parent.find('h1') or column.parent.find('h2')
+                    if continued_from is None:
+                        title_element = column.parent.find('h1') or column.parent.find('h2')
+                    else:
+                        title_element = remaining.title(continued_from)
                     title_text = title_element.get_text().strip() if title_element else f"Slide {slide_index + 1}"
                     
                     title_box = next_slide.shapes.add_textbox(
@@ -1086,38 +1120,21 @@ def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, pr
                     p.font.size = Pt(24)
                     p.font.bold = True
                     
-                    # Process remaining rows on new slide
-                    remaining_rows_index = rows.index(row)
-                    if remaining_rows_index >= 0:
-                        new_column = BeautifulSoup("<div></div>", "html.parser").div
-                        for r in rows[remaining_rows_index:]:
-                            new_column.append(r.copy())
-                        
-                        process_column_content(new_column, next_slide, x_pos, Inches(1.5), width, slide_index + 1, prs)
-                    break
+                    # Process remaining rows on new slide, starting with this one
+                    if first_slide_y is None:
+                        first_slide_y = current_y
+                    slide = next_slide
+                    current_y = Inches(1.5)
+                    slide_index += 1
+                    continued_from = row_index
+                    print(f"Processing column content with {len(rows) - row_index} rows")
                 
                 # Extract content from this row
                 img_tags = row.find_all('img')
                 has_images = len(img_tags) > 0
                 
-                # Get text content
-                header_text = ""
-                for header in row.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-                    header_text += header.get_text().strip() + " "
-                
-                paragraph_text = ""
-                for para in row.find_all('p'):
-                    paragraph_text += para.get_text().strip() + " "
-                
-                # Get any other text
-                other_text = ""
-                row_copy = BeautifulSoup(str(row), 'html.parser')
-                for tag in row_copy.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'img']):
-                    tag.decompose()
-                
-                for element in row_copy.descendants:
-                    if isinstance(element, str) and element.strip():
-                        other_text += element.strip() + " "
+                # Get header, paragraph and any other text in one walk of the row
+                header_text, paragraph_text, other_text = collect_row_text(row)
                 
                 # Combine all text
                 combined_text = (header_text + " " + paragraph_text + " " + other_text).strip()
@@ -1284,7 +1301,7 @@ def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, pr
                             
                             if img_url:
                                 # Increase timeout to help with connection issues
-                                response = requests.get(img_url, stream=True, timeout=15)
+                                response = get_default_fetcher().fetch(img_url, timeout=15)
                                 if response.status_code == 200:
                                     img_bytes = BytesIO(response.content)
                                     
@@ -1381,7 +1398,7 @@ def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, pr
     except Exception as column_error:
         print(f"Error processing column: {column_error}")
     
-    return current_y
+    return current_y if first_slide_y is None else first_slide_y
 
 # Helper function to calculate appropriate box height
 def calculate_dynamic_box_height(header_text, paragraph_text, other_text, has_images, image_height):
@@ -1529,7 +1546,7 @@ def process_content(element, text_frame, slide, y_position=None, prs=None, slide
         img_alt = img.get('alt', 'Image')
         
         try:
-            response = requests.get(img_url, stream=True, timeout=10)
+            response = get_default_fetcher().fetch(img_url, timeout=10)
             
             if response.status_code == 200:
                 img_bytes = BytesIO(response.content)
@@ -1696,7 +1713,7 @@ def process_image_with_download(element, text_frame, slide, css_rules, y_positio
     
     try:
         # Download the image with timeout
-        response = requests.get(img_url, stream=True, timeout=10)
+        response = get_default_fetcher().fetch(img_url, timeout=10)
         
         if response.status_code != 200:
             # Failed to download image
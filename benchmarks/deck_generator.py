@@ -0,0 +1,156 @@
+"""
+Synthetic decks shaped like placeholder.html, for the benchmarks
+
+Slides cycle through the three layouts placeholder.html uses: a standard
+slide of rows, a left-column/right-column slide followed by standalone rows,
+and a colored standard slide with a list. The number of slides, rows per
+slide and images per slide are parameters; images are served from a local
+HTTP server standing in for the real image hosts.
+
+Usage:
+    python benchmarks/deck_generator.py --slides 50 --rows 6 --images 2 > deck.html
+"""
+import argparse
+import contextlib
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image as PILImage
+
+# Row colors the converter knows (see get_color_from_class)
+ROW_COLORS = ('', ' grey', ' red', ' blue', ' green')
+LOREM = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+         "tempor incididunt ut labore et dolore magna aliqua.")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_directory(directory):
+    """Serve directory over HTTP on a free local port, yielding its base URL"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def generate_images(directory, count, width, height):
+    """Write noisy JPEGs that do not compress away, returning their file names"""
+    names = []
+    for i in range(count):
+        img = PILImage.frombytes('RGB', (width, height), os.urandom(width * height * 3))
+        name = f"image_{i}.jpg"
+        img.save(os.path.join(directory, name), quality=90)
+        names.append(name)
+    return names
+
+
+def _row(slide_number, row_number, images, css_class='row'):
+    """One div.row with a heading, a paragraph and the given <img> tags"""
+    color = ROW_COLORS[(slide_number + row_number) % len(ROW_COLORS)]
+    return (f'\n        <div class="{css_class}{color}">'
+            f'\n            <h3>Heading {slide_number + 1}.{row_number + 1}</h3>'
+            f'\n            <p>{LOREM[:40 + (row_number * 17) % len(LOREM)].rstrip()}</p>'
+            + ''.join(f'\n            {img}' for img in images) +
+            '\n        </div>')
+
+
+def _spread(images, rows):
+    """Deal the images out over the rows, one at a time from the first row"""
+    per_row = [[] for _ in range(rows)]
+    for i, img in enumerate(images):
+        per_row[i % rows].append(img)
+    return per_row
+
+
+def build_slide(slide_number, rows, images):
+    """
+    HTML of one slide; the layout depends on its position in the deck
+
+    Args:
+        slide_number (int): Zero-based position of the slide
+        rows (int): Rows on the slide (at least 1)
+        images (list): <img> tags to place in its rows
+    """
+    rows = max(rows, 1)
+    layout = slide_number % 3
+    per_row = _spread(images, rows)
+
+    if layout == 1:
+        # Half the rows are shared by the columns, the rest go below them as standalone rows
+        column_rows = (rows + 1) // 2
+        left = (column_rows + 1) // 2
+        body = (f'\n        <h1>Columns {slide_number + 1}</h1>'
+                '\n        <div class="left-column">'
+                + ''.join(_row(slide_number, r, per_row[r]) for r in range(left)) +
+                '\n        </div>'
+                '\n        <div class="right-column">'
+                + ''.join(_row(slide_number, r, per_row[r]) for r in range(left, column_rows)) +
+                '\n        </div>'
+                + ''.join(_row(slide_number, r, per_row[r], 'row standalone') for r in range(column_rows, rows)))
+        return f'\n    <div class="slide">{body}\n    </div>'
+
+    body = f'\n        <h1>Slide {slide_number + 1}</h1>' + ''.join(
+        _row(slide_number, r, per_row[r]) for r in range(rows - 1 if layout == 2 else rows))
+    if layout == 2:
+        body += ('\n        <div class="row">'
+                 f'\n            <h3>List {slide_number + 1}</h3>'
+                 '\n            <ul>'
+                 + ''.join(f'\n                <li>Point {i + 1}</li>' for i in range(3)) +
+                 '\n            </ul>'
+                 + ''.join(f'\n            {img}' for img in per_row[-1]) +
+                 '\n        </div>')
+        return f'\n    <div class="slide blue">{body}\n    </div>'
+    return f'\n    <div class="slide">{body}\n    </div>'
+
+
+def build_deck(slides, rows, images, base_url='', image_names=()):
+    """
+    A deck of the given size
+
+    Args:
+        slides (int): Number of slide divs (N)
+        rows (int): Rows per slide (M)
+        images (int): Images per slide (K)
+        base_url (str): URL the images are served from
+        image_names (list): Image files to reference, used in turn
+
+    Returns:
+        str: The HTML document
+    """
+    parts = ['<!DOCTYPE html>\n<html lang="en">\n<head>\n    <meta charset="UTF-8">\n'
+             '    <title>Synthetic deck</title>\n</head>\n<body>']
+    image_number = 0
+    for slide_number in range(slides):
+        tags = []
+        for _ in range(images if image_names else 0):
+            name = image_names[image_number % len(image_names)]
+            tags.append(f'<img src="{base_url}/{name}" alt="Image {image_number + 1}" width="200" height="150">')
+            image_number += 1
+        parts.append(build_slide(slide_number, rows, tags))
+    parts.append('\n</body>\n</html>\n')
+    return ''.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--slides', type=int, default=30, help='Number of slides (N)')
+    parser.add_argument('--rows', type=int, default=4, help='Rows per slide (M)')
+    parser.add_argument('--images', type=int, default=1, help='Images per slide (K)')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='URL the images would be served from')
+    args = parser.parse_args()
+
+    names = [f"image_{i}.jpg" for i in range(max(args.images, 1))]
+    print(build_deck(args.slides, args.rows, args.images, args.base_url, names))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Peak memory benchmark for image-heavy decks
+
+Serves generated JPEGs from a local HTTP server, converts a deck that
+references them with html_to_pptx in a fresh child process, and reports the
+child's peak RSS, wall time and output size.
+
+Usage:
+    python benchmarks/image_memory.py --slides 20 --image-size 2400x1800
+    python benchmarks/image_memory.py --repo /path/to/other/checkout   # compare revisions
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from deck_generator import generate_images, serve_directory
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_deck(base_url, image_names, slides):
+    """Build a placeholder.html-style deck with one image row per slide"""
+    parts = ['<html><body>']
+    for i in range(slides):
+        name = image_names[i % len(image_names)]
+        parts.append(f'''
+    <div class="slide">
+        <h1>Slide {i + 1}</h1>
+        <div class="row">
+            <h3>Client</h3>
+            <p>Row text for slide {i + 1}</p>
+            <img src="{base_url}/{name}" alt="Image {i}" width="200" height="150">
+        </div>
+    </div>''')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+# Runs in the child process so its peak RSS covers only the conversion
+CHILD_SCRIPT = '''
+import sys, time, resource
+sys.path.insert(0, sys.argv[1])
+from newcode import html_to_pptx
+html = open(sys.argv[2], encoding='utf-8').read()
+start = time.perf_counter()
+html_to_pptx(html, sys.argv[3])
+elapsed = time.perf_counter() - start
+print(f"RESULT {elapsed:.3f} {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}")
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--slides', type=int, default=20)
+    parser.add_argument('--images', type=int, default=5, help='Distinct images to generate')
+    parser.add_argument('--image-size', default='2400x1800')
+    parser.add_argument('--repo', default=REPO_ROOT, help='Checkout to import newcode from')
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.image_size.split('x'))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        www_dir = os.path.join(work_dir, 'www')
+        os.makedirs(www_dir)
+        image_names = generate_images(www_dir, args.images, width, height)
+
+        with serve_directory(www_dir) as base_url:
+            html_path = os.path.join(work_dir, 'deck.html')
+            with open(html_path, 'w', encoding='utf-8') as f:
+                f.write(build_deck(base_url, image_names, args.slides))
+
+            output_path = os.path.join(work_dir, 'deck.pptx')
+            env = dict(os.environ, HTMLTOPPT_IMAGE_CACHE=os.path.join(work_dir, 'cache'))
+            result = subprocess.run(
+                [sys.executable, '-c', CHILD_SCRIPT, args.repo, html_path, output_path],
+                capture_output=True, text=True, env=env, check=True
+            )
+
+        elapsed, max_rss = next(line for line in result.stdout.splitlines() if line.startswith('RESULT')).split()[1:]
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        rss_mb = int(max_rss) / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+        print(f"slides={args.slides} images={args.images} size={args.image_size}")
+        print(f"wall time: {float(elapsed):.2f}s")
+        print(f"peak RSS:  {rss_mb:.1f} MB")
+        print(f"output:    {os.path.getsize(output_path) / (1024 * 1024):.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
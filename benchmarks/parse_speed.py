@@ -0,0 +1,112 @@
+"""
+HTML parse-time benchmark for the pluggable parser backends
+
+Renders placeholder.html with data.json, repeats its slides until the deck
+has the requested size, and times parsing it with every installed backend
+(html.parser, lxml, ...). With --verify each backend also converts the
+unscaled deck and the resulting slides are compared shape by shape.
+
+Usage:
+    python benchmarks/parse_speed.py --slides 300
+    python benchmarks/parse_speed.py --slides 1000 --repeat 3 --verify
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bs4.builder import builder_registry
+from pptx import Presentation
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import newcode  # noqa: E402
+from html_parsing import PREFERRED_PARSERS, parse_html  # noqa: E402
+
+
+def render_placeholder_deck():
+    """Render placeholder.html with data.json the way generate_ppt_from_json_and_template does"""
+    with open(os.path.join(REPO_ROOT, 'placeholder.html'), encoding='utf-8') as f:
+        template_html = f.read()
+    with open(os.path.join(REPO_ROOT, 'data.json'), encoding='utf-8') as f:
+        json_data = json.load(f)
+    return newcode.render_template_with_jinja(template_html, json_data)
+
+
+def scale_deck(html_content, slides):
+    """Repeat the deck's slide divs until there are the requested number of them"""
+    soup = parse_html(html_content, 'html.parser')
+    slide_html = [str(slide) for slide in soup.find_all('div', class_='slide')]
+    repeated = [slide_html[i % len(slide_html)] for i in range(slides)]
+    return '<html><body>\n' + '\n'.join(repeated) + '\n</body></html>'
+
+
+def time_parse(html_content, parser, repeat):
+    """Best-of-repeat wall time for parsing the document, and its slide count"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        soup = parse_html(html_content, parser)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(soup.find_all('div', class_='slide'))
+
+
+def dump_shapes(path):
+    """Describe every shape of a saved deck as comparable tuples"""
+    shapes = []
+    for slide_number, slide in enumerate(Presentation(path).slides):
+        for shape in slide.shapes:
+            text = shape.text_frame.text if shape.has_text_frame else ''
+            shapes.append((slide_number, shape.shape_type, shape.left, shape.top,
+                           shape.width, shape.height, text))
+    return shapes
+
+
+def convert_with(html_content, parser, output_dir):
+    output = os.path.join(output_dir, f"deck_{parser.replace('.', '_')}.pptx")
+    with contextlib.redirect_stdout(io.StringIO()):
+        newcode.html_to_pptx(html_content, output, image_dpi=None, parser=parser)
+    return dump_shapes(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, default=300, help='Slides in the scaled deck')
+    parser.add_argument('--repeat', type=int, default=5, help='Parses per backend; the best time is reported')
+    parser.add_argument('--verify', action='store_true', help='Check that every backend produces the same slides')
+    args = parser.parse_args()
+
+    backends = [name for name in PREFERRED_PARSERS if builder_registry.lookup(name) is not None]
+    deck = render_placeholder_deck()
+    scaled = scale_deck(deck, args.slides)
+    print(f"Deck: {args.slides} slides, {len(scaled) / 1024:.0f} KB of HTML")
+
+    results = {}
+    for backend in backends:
+        elapsed, slide_count = time_parse(scaled, backend, args.repeat)
+        results[backend] = elapsed
+        print(f"  {backend:<12} {elapsed * 1000:8.1f} ms  ({slide_count} slides found)")
+
+    baseline = results.get('html.parser')
+    if baseline:
+        for backend, elapsed in results.items():
+            if backend != 'html.parser':
+                print(f"  {backend} is {baseline / elapsed:.1f}x faster than html.parser")
+
+    if args.verify:
+        with tempfile.TemporaryDirectory() as output_dir:
+            dumps = {backend: convert_with(deck, backend, output_dir) for backend in backends}
+        reference = dumps['html.parser']
+        for backend, shapes in dumps.items():
+            status = 'identical' if shapes == reference else 'DIFFERENT'
+            print(f"  {backend:<12} slide output {status} ({len(shapes)} shapes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Scaling benchmark for html_to_pptx
+
+Generates synthetic decks (see deck_generator.py) of growing size, converts
+each one in a fresh child process against a local image server, and reports
+wall time, peak RSS and output size per deck. Either the number of slides
+or the number of rows per slide grows - whichever is given several values.
+Between consecutive sizes it prints the growth exponent: how fast time and
+memory grow relative to that number. Linear code stays at or below 1.0;
+quadratic work such as a list membership check or rows.index() per row
+shows up as a climbing exponent, and sizes where it exceeds --threshold
+are flagged.
+
+Usage:
+    python benchmarks/scaling.py --slides 25,50,100,200 --rows 6 --images 1
+    python benchmarks/scaling.py --slides 3 --rows 50,100,200,400 --module aprirl4
+    python benchmarks/scaling.py --repo /path/to/other/checkout --check
+"""
+import argparse
+import math
+import os
+import subprocess
+import sys
+import tempfile
+
+from deck_generator import build_deck, generate_images, serve_directory
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child process so its peak RSS covers only the conversion
+CHILD_SCRIPT = '''
+import contextlib, importlib, io, sys, time, resource
+sys.path.insert(0, sys.argv[1])
+converter = importlib.import_module(sys.argv[2])
+html = open(sys.argv[3], encoding='utf-8').read()
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    converter.html_to_pptx(html, sys.argv[4], sys.argv[5] or None)
+elapsed = time.perf_counter() - start
+print(f"RESULT {elapsed:.3f} {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss} {baseline}")
+'''
+
+
+def convert(repo, module, html_path, output_path, banner_url, work_dir):
+    """
+    Convert one deck in a child process with empty caches
+
+    Returns:
+        tuple: (seconds, peak RSS in MB, peak RSS in MB before the conversion started)
+    """
+    env = dict(os.environ,
+               HTMLTOPPT_IMAGE_CACHE=tempfile.mkdtemp(dir=work_dir),
+               HTMLTOPPT_DOCUMENT_CACHE=tempfile.mkdtemp(dir=work_dir))
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT, repo, module, html_path, output_path, banner_url],
+        capture_output=True, text=True, env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Conversion failed:\n{result.stderr.strip()}")
+
+    elapsed, max_rss, baseline = next(line for line in result.stdout.splitlines() if line.startswith('RESULT')).split()[1:]
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return float(elapsed), int(max_rss) / unit, int(baseline) / unit
+
+
+def growth_exponent(n1, v1, n2, v2):
+    """Exponent e with v ~ n**e between two measurements (None if it is not defined)"""
+    if n1 <= 0 or n2 <= n1 or v1 <= 0 or v2 <= 0:
+        return None
+    return math.log(v2 / v1) / math.log(n2 / n1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', default='25,50,100,200', help='Number of slides (N), comma-separated to sweep it')
+    parser.add_argument('--rows', default='4', help='Rows per slide (M), comma-separated to sweep it')
+    parser.add_argument('--images', type=int, default=1, help='Images per slide (K)')
+    parser.add_argument('--distinct-images', type=int, default=8, help='Image files generated and served')
+    parser.add_argument('--image-size', default='640x480')
+    parser.add_argument('--repeat', type=int, default=1, help='Conversions per size; the fastest is reported')
+    parser.add_argument('--repo', default=REPO_ROOT, help='Checkout to import the converter from')
+    parser.add_argument('--module', default='newcode', help='Converter module providing html_to_pptx')
+    parser.add_argument('--threshold', type=float, default=1.3,
+                        help='Growth exponent above which a step is flagged as superlinear')
+    parser.add_argument('--check', action='store_true', help='Exit with status 1 if any step is flagged')
+    args = parser.parse_args()
+
+    slide_counts = sorted(int(n) for n in args.slides.split(','))
+    row_counts = sorted(int(n) for n in args.rows.split(','))
+    if len(slide_counts) > 1 and len(row_counts) > 1:
+        parser.error('sweep either --slides or --rows, not both')
+    if len(row_counts) > 1:
+        swept = 'rows'
+        decks = [(slide_counts[0], rows) for rows in row_counts]
+    else:
+        swept = 'slides'
+        decks = [(slides, row_counts[0]) for slides in slide_counts]
+    width, height = (int(v) for v in args.image_size.split('x'))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        www_dir = os.path.join(work_dir, 'www')
+        os.makedirs(www_dir)
+        image_names = generate_images(www_dir, args.distinct_images, width, height)
+        banner_name = generate_images(www_dir, 1, 800, 100)[0]
+        os.replace(os.path.join(www_dir, banner_name), os.path.join(www_dir, 'banner.jpg'))
+
+        print(f"module={args.module} slides={args.slides} rows={args.rows} images={args.images} "
+              f"image-size={args.image_size}")
+        print(f"{'slides':>7} {'rows':>5} {'time s':>8} {'ms/slide':>9} {'RSS MB':>8} {'output KB':>10} "
+              f"{'time exp':>9} {'RSS exp':>8}")
+
+        flagged = []
+        previous = None
+        with serve_directory(www_dir) as base_url:
+            for slides, rows in decks:
+                size = rows if swept == 'rows' else slides
+                html_path = os.path.join(work_dir, f'deck_{slides}x{rows}.html')
+                with open(html_path, 'w', encoding='utf-8') as f:
+                    f.write(build_deck(slides, rows, args.images, base_url, image_names))
+
+                output_path = os.path.join(work_dir, f'deck_{slides}x{rows}.pptx')
+                runs = [convert(args.repo, args.module, html_path, output_path, f"{base_url}/banner.jpg", work_dir)
+                        for _ in range(args.repeat)]
+                elapsed = min(run[0] for run in runs)
+                rss_mb = max(run[1] for run in runs)
+                # Memory above the interpreter and its imports is what grows with the deck
+                deck_mb = max(run[1] - run[2] for run in runs)
+                output_kb = os.path.getsize(output_path) / 1024
+
+                time_exp = rss_exp = None
+                if previous:
+                    time_exp = growth_exponent(previous[0], previous[1], size, elapsed)
+                    rss_exp = growth_exponent(previous[0], previous[2], size, deck_mb)
+                previous = (size, elapsed, deck_mb)
+
+                flag = ''
+                if time_exp is not None and time_exp > args.threshold:
+                    flag = '  <- superlinear'
+                    flagged.append(size)
+                print(f"{slides:>7} {rows:>5} {elapsed:>8.2f} {elapsed * 1000 / slides:>9.1f} {rss_mb:>8.1f} {output_kb:>10.0f} "
+                      f"{'-' if time_exp is None else f'{time_exp:.2f}':>9} "
+                      f"{'-' if rss_exp is None else f'{rss_exp:.2f}':>8}{flag}")
+
+    if flagged:
+        print(f"Time grew faster than n**{args.threshold} up to {', '.join(map(str, flagged))} {swept}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import functools
+import gzip
+import hashlib
+import inspect
+import json
+import os
+import threading
+import bs4
+import slide_ir
+from slide_ir import IR_VERSION, dump_slides, load_slides
+
+# Optional - when installed it is the default parser, so its version is part of the stamp
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+# Default on-disk cache of compiled documents
+DEFAULT_DOCUMENT_CACHE_DIR = os.environ.get(
+    'HTMLTOPPT_DOCUMENT_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'htmltoppt', 'documents')
+)
+DEFAULT_DOCUMENT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 64 MB
+# Modules whose code decides what a document compiles to
+COMPILER_MODULES = ('slide_ir.py', 'dom_index.py', 'html_parsing.py')
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_version(color_of=None):
+    """
+    Version stamp of the slide compiler
+
+    Combines IR_VERSION with a hash of the compiler's source, the installed
+    BeautifulSoup and lxml (and libxml2) versions and the color function's
+    source, so cached documents are recompiled after any of them changes -
+    even if nobody remembered to bump IR_VERSION.
+
+    Args:
+        color_of: Function colors were resolved with (optional)
+
+    Returns:
+        str: Stamp stored with, and compared against, every cache entry
+    """
+    digest = hashlib.sha256(f"{IR_VERSION}:{bs4.__version__}".encode('utf-8'))
+    if lxml_etree is not None:
+        # A new lxml or libxml2 can repair broken markup differently
+        digest.update(f":{lxml_etree.LXML_VERSION}:{lxml_etree.LIBXML_VERSION}".encode('utf-8'))
+    module_dir = os.path.dirname(os.path.abspath(slide_ir.__file__))
+    for name in COMPILER_MODULES:
+        try:
+            with open(os.path.join(module_dir, name), 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(name.encode('utf-8'))
+    if color_of is not None:
+        try:
+            digest.update(inspect.getsource(color_of).encode('utf-8'))
+        except (OSError, TypeError):
+            digest.update(repr(color_of).encode('utf-8'))
+    return f"{IR_VERSION}-{digest.hexdigest()[:16]}"
+
+
+class DocumentCache:
+    """
+    Persistent cache of compiled slides keyed by the hash of the HTML
+
+    Converting the same rendered HTML again - a re-export, or a retry after
+    a failed save - loads the compiled slides instead of parsing the document.
+    Entries are gzipped JSON carrying the compiler_version() they were built
+    with; an entry from another version counts as a miss and is overwritten.
+    The least recently used entries are removed once the cache exceeds max_bytes.
+
+    Args:
+        cache_dir (str): Directory for the cache (defaults to DEFAULT_DOCUMENT_CACHE_DIR)
+        max_bytes (int): Maximum total size of the stored entries
+        version (str): Version stamp (defaults to compiler_version())
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_DOCUMENT_CACHE_MAX_BYTES, version=None):
+        self.cache_dir = cache_dir or DEFAULT_DOCUMENT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.version = version or compiler_version()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _key(self, html_content, parser):
+        # Parsers repair broken markup differently, so each gets its own entry
+        digest = hashlib.sha256(parser.encode('utf-8') + b'\0')
+        digest.update(html_content.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def _entry_path(self, html_content, parser):
+        return os.path.join(self.cache_dir, self._key(html_content, parser) + '.json.gz')
+
+    def load(self, html_content, parser):
+        """
+        Return the cached slides for a document, or None on a miss
+
+        Args:
+            html_content (str): The HTML that was converted
+            parser (str): Name of the tree builder it was parsed with
+        """
+        path = self._entry_path(html_content, parser)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, EOFError, ValueError):
+            return None
+        if entry.get('version') != self.version:
+            return None
+
+        try:
+            slides = load_slides(entry['slides'])
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable document cache entry {path}: {e}")
+            return None
+
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        return slides
+
+    def store(self, html_content, parser, slides):
+        """Store the compiled slides of a document"""
+        path = self._entry_path(html_content, parser)
+        entry = {'version': self.version, 'slides': dump_slides(slides)}
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=1) as f:
+                json.dump(entry, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not write document cache entry: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.json.gz'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total_bytes -= size
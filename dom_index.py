@@ -0,0 +1,254 @@
+from bisect import bisect_left
+from bs4 import CData, NavigableString, Tag
+
+# String types that Tag.get_text() includes (comments, scripts and styles are skipped)
+TEXT_STRING_TYPES = (NavigableString, CData)
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+
+class TextCache:
+    """
+    Memo of node.get_text().strip() keyed by node identity
+
+    One cache lives for a whole conversion, so a title or row whose text is
+    needed for estimation, overflow checks and rendering is only joined once.
+    The node is kept alongside its text so its id cannot be reused by another
+    node while the cache is alive.
+    """
+
+    def __init__(self):
+        self._texts = {}
+
+    def text(self, node):
+        """Stripped text of node, computed on first use"""
+        cached = self._texts.get(id(node))
+        if cached is not None and cached[0] is node:
+            return cached[1]
+        text = node.get_text().strip()
+        self._texts[id(node)] = (node, text)
+        return text
+
+    def clear(self):
+        self._texts.clear()
+
+
+class DomIndex:
+    """
+    Index of everything under an element, built in a single traversal
+
+    Every tag gets a position in document order and the span of positions
+    its descendants occupy. Tags are also listed per kind - their tag name,
+    and 'name.class' for each of their classes (e.g. 'div.row'). With those, find(),
+    find_all() and count() for any indexed node come down to a binary search
+    instead of another walk of its subtree. Stripped text lengths are
+    computed bottom-up during the same traversal.
+
+    The index describes the tree as it was when built; rebuild it after
+    changing the tree.
+
+    Args:
+        root: BeautifulSoup tag to index
+        text_cache (TextCache): Conversion-wide text memo (a new one by default)
+    """
+
+    def __init__(self, root, text_cache=None):
+        self.root = root
+        self.text_cache = text_cache or TextCache()
+        # id(tag) -> (position of first descendant, position after the last)
+        self._spans = {}
+        # id(tag) -> (text length, leading whitespace, trailing whitespace)
+        self._text = {}
+        # kind -> positions and tags, both in document order
+        self._positions = {}
+        self._tags = {}
+        self._build(root)
+
+    @classmethod
+    def for_element(cls, element, index=None):
+        """Return index if it covers element, otherwise index element on its own"""
+        if index is not None and index.covers(element):
+            return index
+        return cls(element, index.text_cache if index is not None else None)
+
+    def _build(self, root):
+        position = 0
+        # (tag, entered) pairs; a tag is finished once all its children are
+        stack = [(root, False)]
+        while stack:
+            node, entered = stack.pop()
+            if entered:
+                self._spans[id(node)] = (self._spans[id(node)], position)
+                self._text[id(node)] = join_text_metrics(
+                    self._text.get(id(child)) if isinstance(child, Tag) else _string_metrics(child)
+                    for child in node.contents
+                )
+                continue
+
+            # Descendants start right after this tag's own position
+            position += 1
+            self._spans[id(node)] = position
+            if node is not root:
+                self._add(node.name, position - 1, node)
+                for class_name in node.get('class') or ():
+                    self._add(f"{node.name}.{class_name}", position - 1, node)
+
+            stack.append((node, True))
+            for child in reversed(node.contents):
+                if isinstance(child, Tag):
+                    stack.append((child, False))
+
+    def _add(self, kind, position, tag):
+        self._positions.setdefault(kind, []).append(position)
+        self._tags.setdefault(kind, []).append(tag)
+
+    def covers(self, node):
+        """Check whether node is part of the indexed tree"""
+        return id(node) in self._spans
+
+    def _range(self, node, kind):
+        start, end = self._spans[id(node)]
+        positions = self._positions.get(kind, ())
+        return bisect_left(positions, start), bisect_left(positions, end)
+
+    def find(self, node, *kinds):
+        """First descendant of node of any of the given kinds, like node.find()"""
+        first = None
+        for kind in kinds:
+            lo, hi = self._range(node, kind)
+            if lo < hi and (first is None or self._positions[kind][lo] < first[0]):
+                first = (self._positions[kind][lo], self._tags[kind][lo])
+        return first[1] if first else None
+
+    def find_all(self, node, *kinds):
+        """All descendants of node of the given kinds in document order, like node.find_all()"""
+        found = []
+        for kind in kinds:
+            lo, hi = self._range(node, kind)
+            found.extend(zip(self._positions[kind][lo:hi], self._tags[kind][lo:hi]) if lo < hi else ())
+        if len(kinds) > 1:
+            found.sort(key=lambda item: item[0])
+        return [tag for _, tag in found]
+
+    def count(self, node, kind):
+        """Number of descendants of node of the given kind"""
+        lo, hi = self._range(node, kind)
+        return hi - lo
+
+    def images(self, node):
+        """The <img> tags under node, in document order"""
+        return self.find_all(node, 'img')
+
+    def text(self, node):
+        """node.get_text().strip(), memoized in the text cache"""
+        return self.text_cache.text(node)
+
+    def text_length(self, node):
+        """len(node.get_text().strip()) without building the text"""
+        if node.interesting_string_types != TEXT_STRING_TYPES:
+            # <style>, <script> and <template> only count their own string type
+            return len(node.get_text().strip())
+        length, leading, trailing = self._text[id(node)]
+        if leading == length:
+            return 0
+        return length - leading - trailing
+
+
+def _string_metrics(string):
+    if type(string) not in TEXT_STRING_TYPES:
+        return None
+    length = len(string)
+    return length, length - len(string.lstrip()), length - len(string.rstrip())
+
+
+def join_text_metrics(parts):
+    """Combine (length, leading, trailing) whitespace metrics of consecutive text pieces"""
+    length = leading = trailing = 0
+    for part in parts:
+        if part is None or part[0] == 0:
+            continue
+        part_length, part_leading, part_trailing = part
+        # Leading whitespace runs on while everything so far is whitespace
+        if leading == length:
+            leading = length + part_leading
+        trailing = part_trailing if part_leading < part_length else trailing + part_length
+        length += part_length
+    return length, leading, trailing
+
+
+def iter_stripped_strings(root, exclude=()):
+    """
+    Yield every non-blank string under root, stripped, in document order
+
+    Tags named in exclude are skipped with their whole subtree, as if they had
+    been decomposed - without copying or modifying the tree. Like iterating
+    over .descendants, this includes comments and script text.
+    """
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Tag):
+            if node.name in exclude:
+                continue
+            stack.extend(reversed(node.contents))
+        elif node.strip():
+            yield node.strip()
+
+
+def collect_row_text(row, header_tags=HEADING_TAGS, paragraph_tags=('p',), skip_tags=('img',)):
+    """
+    Split the text of a row into header, paragraph and other text in one walk
+
+    Produces the same strings as calling get_text() on every header and
+    paragraph and then collecting the strings left after decomposing headers,
+    paragraphs and images from a copy of the row, but reads the original
+    tree once and never modifies it.
+
+    Args:
+        row: Row element
+        header_tags (tuple): Tags collected as header text
+        paragraph_tags (tuple): Tags collected as paragraph text
+        skip_tags (tuple): Tags left out of the other text, like headers and paragraphs
+
+    Returns:
+        tuple: (header_text, paragraph_text, other_text), each piece followed by a space
+    """
+    headers, paragraphs, other = [], [], []
+    # Text buffers of the headers/paragraphs we are currently inside
+    open_buffers = []
+    excluded_depth = 0
+    excluded_tags = set(header_tags) | set(paragraph_tags) | set(skip_tags)
+    
+    # (node, leaving) pairs - a tag is pushed a second time to close it
+    stack = [(row, False)]
+    while stack:
+        node, leaving = stack.pop()
+        if not isinstance(node, Tag):
+            if type(node) in TEXT_STRING_TYPES:
+                for buffer in open_buffers:
+                    buffer.append(node)
+            if not excluded_depth and node.strip():
+                other.append(node.strip())
+            continue
+        
+        collected = node is not row and (node.name in header_tags or node.name in paragraph_tags)
+        if leaving:
+            if collected:
+                open_buffers.pop()
+            if node.name in excluded_tags:
+                excluded_depth -= 1
+            continue
+        
+        if collected:
+            buffer = []
+            (headers if node.name in header_tags else paragraphs).append(buffer)
+            open_buffers.append(buffer)
+        if node.name in excluded_tags:
+            excluded_depth += 1
+        
+        stack.append((node, True))
+        stack.extend((child, False) for child in reversed(node.contents))
+    
+    header_text = "".join("".join(buffer).strip() + " " for buffer in headers)
+    paragraph_text = "".join("".join(buffer).strip() + " " for buffer in paragraphs)
+    other_text = "".join(text + " " for text in other)
+    return header_text, paragraph_text, other_text
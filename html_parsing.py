@@ -0,0 +1,142 @@
+import codecs
+import os
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+# Optional - without lxml, streaming falls back to parsing the whole document
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Tree builders in order of preference - lxml parses in C and is several
+# times faster than the pure-Python html.parser, which is always available
+PREFERRED_PARSERS = ('lxml', 'html.parser')
+FALLBACK_PARSER = 'html.parser'
+# Force a specific backend, e.g. HTMLTOPPT_PARSER=html.parser
+DEFAULT_PARSER = os.environ.get('HTMLTOPPT_PARSER') or None
+# Characters read from a file or string per step when streaming slides
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def resolve_parser(parser=None):
+    """
+    Pick the tree builder to parse slide HTML with
+
+    Args:
+        parser (str): Requested backend (defaults to DEFAULT_PARSER, then the
+            first installed entry of PREFERRED_PARSERS)
+
+    Returns:
+        str: Name of an installed BeautifulSoup tree builder
+    """
+    requested = parser or DEFAULT_PARSER
+    if requested:
+        if builder_registry.lookup(requested) is not None:
+            return requested
+        print(f"Warning: HTML parser '{requested}' is not installed, using {FALLBACK_PARSER}")
+        return FALLBACK_PARSER
+
+    for name in PREFERRED_PARSERS:
+        if builder_registry.lookup(name) is not None:
+            return name
+    return FALLBACK_PARSER
+
+
+def parse_html(html_content, parser=None):
+    """
+    Parse slide HTML with the fastest available backend
+
+    Args:
+        html_content (str): HTML document or fragment
+        parser (str): Backend to use instead of the default choice (optional)
+
+    Returns:
+        BeautifulSoup: The parsed document
+    """
+    return BeautifulSoup(html_content, resolve_parser(parser))
+
+
+def iter_slide_divs(source, parser=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield the slide divs of a document one at a time, without parsing it whole
+
+    The source is fed to lxml's pull parser in chunks. Every time a top-level
+    div.slide is complete, just that subtree is parsed with BeautifulSoup and
+    its slide divs are yielded (the div itself, then any slides nested in it,
+    as find_all() would list them). The subtree is released once the caller
+    asks for the next slide, so memory stays bounded by the largest slide
+    rather than growing with the document.
+
+    Args:
+        source: HTML as a string, a text or binary file object, or an iterable
+            of str/bytes chunks (e.g. Jinja's Template.generate())
+        parser (str): Backend for each slide's BeautifulSoup (see resolve_parser)
+        chunk_size (int): Characters fed to the pull parser per step
+
+    Yields:
+        Tag: Each div.slide, in document order
+    """
+    parser = resolve_parser(parser)
+    if etree is None:
+        print("Warning: lxml is not installed, parsing the whole document instead of streaming it")
+        soup = parse_html("".join(_iter_chunks(source, chunk_size)), parser)
+        yield from soup.find_all('div', class_='slide')
+        return
+
+    pull_parser = etree.HTMLPullParser(events=('start', 'end'))
+    # Slide divs currently open - only the outermost one is cut out of the tree
+    open_slides = 0
+
+    def completed_slides():
+        nonlocal open_slides
+        for event, element in pull_parser.read_events():
+            if element.tag != 'div' or 'slide' not in (element.get('class') or '').split():
+                continue
+            if event == 'start':
+                open_slides += 1
+                continue
+            open_slides -= 1
+            if open_slides:
+                continue
+
+            fragment = etree.tostring(element, method='html', encoding='unicode', with_tail=False)
+            _release(element)
+            soup = parse_html(fragment, parser)
+            yield from soup.find_all('div', class_='slide')
+            soup.decompose()
+
+    for chunk in _iter_chunks(source, chunk_size):
+        pull_parser.feed(chunk)
+        yield from completed_slides()
+    pull_parser.close()
+    yield from completed_slides()
+
+
+def _release(element):
+    """Drop a finished element's children and everything before it in its parent"""
+    element.clear(keep_tail=False)
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def _iter_chunks(source, chunk_size):
+    """Text chunks of a string, file object or iterable of str/bytes chunks"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    if isinstance(source, (str, bytes)):
+        chunks = (source[start:start + chunk_size] for start in range(0, len(source), chunk_size))
+    elif hasattr(source, 'read'):
+        chunks = iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        chunks = source
+
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
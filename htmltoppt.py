@@ -7,6 +7,8 @@ import re
 import html
 import sys
 import os
+from html_parsing import parse_html
+from stylesheet import compile_stylesheet
 
 def html_to_pptx(html_content, output_filename="presentation.pptx"):
     """
@@ -20,7 +22,7 @@ def html_to_pptx(html_content, output_filename="presentation.pptx"):
     prs = Presentation()
     
     # Parse HTML content
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = parse_html(html_content)
     
     # Extract styles from the HTML
     css_rules = extract_css_rules(soup)
@@ -89,30 +91,8 @@ def process_slide_content_without_placeholders(slide, text_frame, css_rules):
                     last_p.space_after = Pt(12)
 
 def extract_css_rules(soup):
-    """Extract CSS rules from style tags in the HTML"""
-    css_rules = {}
-    
-    # Find all style tags
-    style_tags = soup.find_all('style')
-    for style_tag in style_tags:
-        style_content = style_tag.string
-        if not style_content:
-            continue
-            
-        # Extract class-based rules
-        for rule in re.findall(r'\.([^\s{]+)\s*{([^}]+)}', style_content):
-            class_name = rule[0]
-            properties = {}
-            
-            # Extract properties
-            for prop in re.findall(r'([^:;]+):\s*([^;]+);?', rule[1]):
-                prop_name = prop[0].strip()
-                prop_value = prop[1].strip()
-                properties[prop_name] = prop_value
-                
-            css_rules[class_name] = properties
-    
-    return css_rules
+    """Compile the CSS of the document's style tags into an indexed Stylesheet"""
+    return compile_stylesheet(soup)
 
 def get_slide_placeholders(slide):
     """Get a mapping of placeholder names to placeholder objects"""
@@ -278,62 +258,57 @@ def process_image(element, text_frame, css_rules):
         p.alignment = PP_ALIGN.CENTER
 
 def apply_css_to_paragraph(paragraph, element, css_rules):
-    """Apply CSS styling to a PowerPoint paragraph based on element classes"""
-    # Get classes from the element
-    classes = element.get('class', [])
-    if isinstance(classes, str):
-        classes = classes.split()
-        
-    # Apply styling from each class
-    for class_name in classes:
-        if class_name in css_rules:
-            props = css_rules[class_name]
+    """Apply CSS styling to a PowerPoint paragraph based on the rules matching the element"""
+    # Cascaded declarations of the element - a dictionary hit for elements styled before
+    props = css_rules.style_for(element)
+    if not props:
+        return
+    
+    # Text alignment
+    if 'text-align' in props:
+        align_value = props['text-align'].lower()
+        if align_value == 'center':
+            paragraph.alignment = PP_ALIGN.CENTER
+        elif align_value == 'right':
+            paragraph.alignment = PP_ALIGN.RIGHT
+        elif align_value == 'justify':
+            paragraph.alignment = PP_ALIGN.JUSTIFY
             
-            # Text alignment
-            if 'text-align' in props:
-                align_value = props['text-align'].lower()
-                if align_value == 'center':
-                    paragraph.alignment = PP_ALIGN.CENTER
-                elif align_value == 'right':
-                    paragraph.alignment = PP_ALIGN.RIGHT
-                elif align_value == 'justify':
-                    paragraph.alignment = PP_ALIGN.JUSTIFY
-                    
-            # Font size (approximate conversion from px/em to points)
-            if 'font-size' in props:
-                size_str = props['font-size']
-                size_value = extract_numeric_value(size_str)
+    # Font size (approximate conversion from px/em to points)
+    if 'font-size' in props:
+        size_str = props['font-size']
+        size_value = extract_numeric_value(size_str)
+        
+        if size_value:
+            # Convert common units to points (approximate)
+            if 'px' in size_str:
+                paragraph.font.size = Pt(size_value * 0.75)  # px to pt conversion
+            elif 'em' in size_str:
+                paragraph.font.size = Pt(size_value * 12)  # em to pt conversion
+            elif 'pt' in size_str:
+                paragraph.font.size = Pt(size_value)
+            else:
+                # Default unit or percentage
+                paragraph.font.size = Pt(size_value)
                 
-                if size_value:
-                    # Convert common units to points (approximate)
-                    if 'px' in size_str:
-                        paragraph.font.size = Pt(size_value * 0.75)  # px to pt conversion
-                    elif 'em' in size_str:
-                        paragraph.font.size = Pt(size_value * 12)  # em to pt conversion
-                    elif 'pt' in size_str:
-                        paragraph.font.size = Pt(size_value)
-                    else:
-                        # Default unit or percentage
-                        paragraph.font.size = Pt(size_value)
-                        
-            # Font weight
-            if 'font-weight' in props:
-                weight = props['font-weight'].lower()
-                if weight in ['bold', 'bolder', '700', '800', '900']:
-                    paragraph.font.bold = True
-                    
-            # Font style
-            if 'font-style' in props:
-                style = props['font-style'].lower()
-                if style == 'italic':
-                    paragraph.font.italic = True
-                    
-            # Text color (simplified conversion)
-            if 'color' in props:
-                color = props['color']
-                rgb = extract_rgb_color(color)
-                if rgb:
-                    paragraph.font.color.rgb = RGBColor(*rgb)
+    # Font weight
+    if 'font-weight' in props:
+        weight = props['font-weight'].lower()
+        if weight in ['bold', 'bolder', '700', '800', '900']:
+            paragraph.font.bold = True
+            
+    # Font style
+    if 'font-style' in props:
+        style = props['font-style'].lower()
+        if style == 'italic':
+            paragraph.font.italic = True
+            
+    # Text color (simplified conversion)
+    if 'color' in props:
+        color = props['color']
+        rgb = extract_rgb_color(color)
+        if rgb:
+            paragraph.font.color.rgb = RGBColor(*rgb)
 
 def extract_numeric_value(value_str):
     """Extract numeric value from a CSS value string"""
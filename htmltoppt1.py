@@ -12,6 +12,10 @@ import html
 import sys
 import os
 import copy
+from dom_index import iter_stripped_strings
+from html_parsing import parse_html
+from htmltoppt import apply_css_to_paragraph
+from stylesheet import compile_stylesheet
 
 # Standard slide dimensions in inches
 SLIDE_WIDTH_INCHES = 10
@@ -29,10 +33,10 @@ def html_to_pptx(html_content, output_filename="presentation.pptx"):
     prs = Presentation()
     
     # Parse HTML content
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = parse_html(html_content)
     
     # Extract styles from the HTML
-    css_rules = extract_css_rules(soup)
+    css_rules = compile_stylesheet(soup)
     
     # Find all slide divs
     slides = soup.find_all('div', class_='slide')
@@ -268,17 +272,8 @@ def process_row_in_column(row, slide, x_pos, y_pos, width, css_rules):
     # Extract text content properly
     text = ""
     try:
-        # Create a temporary copy of the row to work with
-        row_copy = BeautifulSoup(str(row), 'html.parser')
-        for img_tag in row_copy.find_all('img'):
-            img_tag.decompose()  # Remove image tags
-        
-        # Collect all text from all nodes
-        for element in row_copy.descendants:
-            if isinstance(element, str) and element.strip():
-                text += element.strip() + " "
-        
-        text = text.strip()
+        # Collect the text of all nodes except images, without copying the row
+        text = " ".join(iter_stripped_strings(row, exclude=('img',)))
     except Exception as e:
         print(f"Error extracting text: {e}")
         # Fallback to simpler text extraction
@@ -616,17 +611,8 @@ def process_column_content(column, slide, x_pos, y_pos, width, css_rules=None, s
                 # Extract text content properly to include both tag content and direct text
                 text = ""
                 try:
-                    # Create a temporary copy of the row to work with
-                    row_copy = BeautifulSoup(str(row), 'html.parser')
-                    for img_tag in row_copy.find_all('img'):
-                        img_tag.decompose()  # Remove image tags
-                    
-                    # Collect all text from all nodes
-                    for element in row_copy.descendants:
-                        if isinstance(element, str) and element.strip():
-                            text += element.strip() + " "
-                    
-                    text = text.strip()
+                    # Collect the text of all nodes except images, without copying the row
+                    text = " ".join(iter_stripped_strings(row, exclude=('img',)))
                 except Exception as e:
                     print(f"Error extracting text: {e}")
                     # Fallback to simpler text extraction
@@ -0,0 +1,1416 @@
+import base64
+import binascii
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import random
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote_to_bytes, unquote
+from urllib.request import url2pathname
+from io import BytesIO
+import requests
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from PIL import Image as PILImage
+from image_normalizer import needs_normalization, normalize_image
+
+# Default connection pool settings for image and banner downloads
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_TIMEOUT = 15
+DEFAULT_PREFETCH_WORKERS = 8
+
+# Per-host limits and circuit breaker settings
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_RESET_TIMEOUT = 30  # seconds before a failed host is tried again
+
+# Retry and hedging policy for transient failures and slow responses
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_BASE = 0.25  # seconds, doubled on every attempt
+DEFAULT_BACKOFF_MAX = 4
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_HEDGE_DELAY = 1.0  # seconds, used until a host has enough latency samples
+HEDGE_MIN_SAMPLES = 20
+LATENCY_SAMPLES = 200
+
+# Download safety limits
+DEFAULT_MAX_IMAGE_BYTES = 20 * 1024 * 1024  # 20 MB
+DEFAULT_MAX_IMAGE_PIXELS = 40 * 1000 * 1000  # 40 megapixels
+DEFAULT_LOCAL_FILES_MAX_BYTES = 64 * 1024 * 1024  # local images kept in memory between loads
+STREAM_CHUNK_SIZE = 64 * 1024
+# Scheme for protocol-relative sources (//cdn.example.com/logo.png) - the HTML has no page URL
+DEFAULT_SCHEME = 'https'
+
+# Leading bytes of the image formats slides can embed
+IMAGE_SIGNATURES = {
+    b'\x89PNG\r\n\x1a\n': 'png',
+    b'\xff\xd8\xff': 'jpeg',
+    b'GIF87a': 'gif',
+    b'GIF89a': 'gif',
+    b'BM': 'bmp',
+}
+# Container brands of formats that are converted before embedding
+AVIF_BRANDS = (b'avif', b'avis')
+SVG_PREFIXES = (b'<svg', b'<?xml')
+SNIFF_BYTES = 16
+# How far into a streaming download to look for the image dimensions
+PROBE_LIMIT_BYTES = 256 * 1024
+
+# JPEG start-of-frame markers that carry the image dimensions
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Default on-disk image cache settings
+DEFAULT_CACHE_DIR = os.environ.get(
+    'HTMLTOPPT_IMAGE_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'htmltoppt', 'images')
+)
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+# Entries validated this many seconds ago are served without asking the server
+# again, so workers in a batch run share one download per URL
+DEFAULT_CACHE_MIN_FRESH = float(os.environ.get('HTMLTOPPT_IMAGE_MIN_FRESH', '0'))
+LOCK_POLL_INTERVAL = 0.05
+
+
+def canonicalize_url(url):
+    """
+    Normalize a URL so equivalent spellings share one cache entry
+
+    Lowercases the scheme and host, drops default ports and the fragment,
+    and sorts the query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    
+    port = parts.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+    
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+def is_local_source(src):
+    """Check whether an image src names a local file rather than a remote URL"""
+    parts = urlsplit(src)
+    scheme = parts.scheme.lower()
+    if not scheme and parts.netloc:
+        # Protocol-relative: //cdn.example.com/logo.png is remote
+        return False
+    # A single letter is a Windows drive (C:\images\logo.png), not a scheme
+    return scheme in ('', 'file') or len(scheme) == 1
+
+
+def absolute_url(url):
+    """Give a protocol-relative URL (//host/path) the DEFAULT_SCHEME"""
+    return f"{DEFAULT_SCHEME}:{url}" if url.startswith('//') else url
+
+
+def decode_data_uri(uri):
+    """
+    Decode a data: URI into its bytes
+
+    Raises:
+        ValueError: If the URI is malformed
+    """
+    header, separator, payload = uri.partition(',')
+    if not separator:
+        raise ValueError("data URI has no ',' separator")
+    
+    if header.lower().endswith(';base64'):
+        try:
+            return base64.b64decode(payload.strip(), validate=False)
+        except binascii.Error as e:
+            raise ValueError(f"Invalid base64 in data URI: {e}")
+    return unquote_to_bytes(payload)
+
+
+def sniff_image_type(head):
+    """Return the image format named by the leading bytes, or None if unrecognized"""
+    for signature, image_type in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return image_type
+    
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    if head[4:8] == b'ftyp' and head[8:12] in AVIF_BRANDS:
+        return 'avif'
+    if head.lstrip(b'\xef\xbb\xbf \t\r\n').lower().startswith(SVG_PREFIXES):
+        return 'svg'
+    return None
+
+
+def probe_image_size(data):
+    """
+    Read (width, height) from the image header without decoding it
+
+    Supports PNG, JPEG, GIF, WebP and BMP. Works on a partial download as
+    long as the header bytes are present.
+
+    Returns:
+        tuple: (width, height) in pixels, or None if the size is not available
+    """
+    try:
+        if data[:8] == b'\x89PNG\r\n\x1a\n' and data[12:16] == b'IHDR':
+            return struct.unpack('>II', data[16:24])
+        
+        if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+            return struct.unpack('<HH', data[6:10])
+        
+        if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+            chunk = data[12:16]
+            if chunk == b'VP8 ' and len(data) >= 30:
+                width, height = struct.unpack('<HH', data[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b'VP8L' and len(data) >= 25:
+                b0, b1, b2, b3 = data[21:25]
+                return 1 + (((b1 & 0x3F) << 8) | b0), 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+            if chunk == b'VP8X' and len(data) >= 30:
+                return 1 + int.from_bytes(data[24:27], 'little'), 1 + int.from_bytes(data[27:30], 'little')
+            return None
+        
+        if data[:2] == b'BM' and len(data) >= 26:
+            width, height = struct.unpack('<ii', data[18:26])
+            return width, abs(height)
+        
+        if data[:2] == b'\xff\xd8':
+            # Walk the marker segments until a start-of-frame
+            i = 2
+            while i + 9 < len(data):
+                if data[i] != 0xFF:
+                    return None
+                marker = data[i + 1]
+                if marker == 0xFF:
+                    i += 1  # Fill byte
+                    continue
+                if marker in JPEG_SOF_MARKERS:
+                    height, width = struct.unpack('>HH', data[i + 5:i + 9])
+                    return width, height
+                if marker == 0xD8 or marker == 0x01 or 0xD0 <= marker <= 0xD7:
+                    i += 2
+                    continue
+                i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    except (struct.error, IndexError):
+        pass
+    
+    return None
+
+
+def get_image_size(data):
+    """(width, height) from the image header, falling back to PIL for unusual files"""
+    size = probe_image_size(data)
+    if size is None:
+        with PILImage.open(BytesIO(data)) as pil_img:
+            size = pil_img.size
+    return size
+
+
+class ImageRejectedError(ValueError):
+    """Raised when a download is not an acceptable image (wrong type, too large)"""
+
+
+class ImageResponse:
+    """
+    Fully read response body with the status_code / content / headers of requests.Response
+
+    content is an immutable bytes object; wrap it in BytesIO to read it, which
+    shares the buffer rather than copying it. size holds the (width, height)
+    read from the image header when known, so layout needs no PIL work.
+    """
+
+    def __init__(self, content, status_code=200, headers=None, size=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.size = size
+
+
+class DeadlineExceededError(requests.Timeout):
+    """Raised for remote images still outstanding when the conversion's time budget runs out"""
+
+
+def _is_same_file(fd, path):
+    """Check whether the open file fd is still the file at path"""
+    try:
+        return os.path.samestat(os.fstat(fd), os.stat(path))
+    except OSError:
+        return False
+
+
+def _unlock_file(fd):
+    """Release a lock taken with flock (or msvcrt.locking on Windows)"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    except OSError:
+        pass
+
+
+def _is_timeout(error):
+    """Check for a connect or read timeout, including one raised while streaming the body"""
+    if isinstance(error, requests.Timeout):
+        return True
+    # iter_content() re-raises read timeouts as ConnectionError
+    cause = error.args[0] if error.args else None
+    return isinstance(cause, ReadTimeoutError)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised when a host's circuit is open and requests to it are skipped"""
+
+
+class HostCircuit:
+    """
+    Concurrency limit and circuit breaker for a single image host
+
+    After failure_threshold consecutive failed fetches (connection errors,
+    timeouts or 5xx responses, once their retries are used up) the circuit
+    opens and requests are skipped. Once reset_timeout has passed a single
+    trial request is let through; success closes the circuit again, failure
+    re-opens it, and a trial that ends without an answer from the host
+    (e.g. the conversion deadline ran out) puts it back to open as well.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, max_concurrent=DEFAULT_MAX_PER_HOST, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.semaphore = threading.BoundedSemaphore(max_concurrent)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.requests = 0
+        self.skipped = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        # Recent successful response times, for the hedging delay
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Check whether a request may be sent to this host now"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let one trial request through
+                self.state = self.HALF_OPEN
+                self.requests += 1
+                return True
+            
+            if self.state != self.CLOSED:
+                self.skipped += 1
+                return False
+            
+            self.requests += 1
+            return True
+
+    def record_success(self, latency=None):
+        with self._lock:
+            if latency is not None:
+                self.latencies.append(latency)
+            self.failures = 0
+            self.state = self.CLOSED
+            self.opened_at = None
+
+    def record_failure(self, counted=True):
+        """
+        Record a failed request
+
+        Args:
+            counted (bool): Count it towards failure_threshold - False for an
+                attempt that is about to be retried, which only re-opens a
+                half-open circuit
+        """
+        with self._lock:
+            if counted:
+                self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def abandon_trial(self):
+        """End a trial request that got no verdict, so another one is let through after reset_timeout"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_hedge(self, won=False):
+        with self._lock:
+            if won:
+                self.hedge_wins += 1
+            else:
+                self.hedges += 1
+
+    def hedge_delay(self, default=DEFAULT_HEDGE_DELAY):
+        """
+        How long to wait before sending a hedged request to this host
+
+        Returns:
+            float: The p95 of recent response times, or default until enough are recorded
+        """
+        with self._lock:
+            if len(self.latencies) < HEDGE_MIN_SAMPLES:
+                return default
+            samples = sorted(self.latencies)
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'requests': self.requests,
+                'skipped': self.skipped,
+                'retries': self.retries,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+            }
+
+
+class ImageCache:
+    """
+    Persistent image cache keyed by canonical URL
+
+    Each URL gets a small JSON entry with its validators (ETag / Last-Modified)
+    while the bytes live once under their SHA-256 content hash, so the same
+    image served from several URLs is stored only once. The least recently
+    used entries are evicted when the stored bytes exceed max_bytes.
+
+    The cache is safe to share between worker processes. Writes are atomic
+    renames, and lock() gives one worker at a time the right to download a
+    URL while the others wait and then read its result.
+
+    Args:
+        cache_dir (str): Directory for the cache (defaults to DEFAULT_CACHE_DIR)
+        max_bytes (int): Maximum total size of stored images
+        min_fresh (float): Seconds after a download or revalidation during which an
+            entry is served without a request, even without Cache-Control max-age
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_CACHE_MAX_BYTES, min_fresh=DEFAULT_CACHE_MIN_FRESH):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.min_fresh = min_fresh
+        self.entries_dir = os.path.join(self.cache_dir, 'entries')
+        self.objects_dir = os.path.join(self.cache_dir, 'objects')
+        self.locks_dir = os.path.join(self.cache_dir, 'locks')
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.locks_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # Running size estimate so eviction only scans the directory when needed
+        self._total_bytes = None
+
+    def _url_key(self, url):
+        return hashlib.sha256(canonicalize_url(url).encode('utf-8')).hexdigest()
+
+    def _entry_path(self, url):
+        return os.path.join(self.entries_dir, self._url_key(url) + '.json')
+
+    def _object_path(self, content_hash):
+        return os.path.join(self.objects_dir, content_hash[:2], content_hash)
+
+    def _write_json(self, path, data):
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def lookup(self, url):
+        """Return the cache entry for a URL, or None if it is not cached"""
+        try:
+            with open(self._entry_path(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry, validated_since=None):
+        """
+        Check whether an entry can be served without revalidation
+
+        Args:
+            entry (dict): Cache entry from lookup()
+            validated_since (float): Also accept entries downloaded or revalidated
+                after this time.time() value, e.g. by another worker
+        """
+        now = time.time()
+        expires = entry.get('expires')
+        if expires and now < expires:
+            return True
+        
+        validated_at = entry.get('validated_at', 0)
+        if self.min_fresh and now < validated_at + self.min_fresh:
+            return True
+        return validated_since is not None and validated_at >= validated_since
+
+    @contextlib.contextmanager
+    def lock(self, url, timeout=None):
+        """
+        Hold an exclusive cross-process lock for downloading a URL
+
+        Waits at most timeout seconds; after that the caller proceeds unlocked
+        (and may download the URL a second time) rather than hang on a stuck worker.
+
+        Yields:
+            bool: Whether the lock was acquired
+        """
+        lock_path = os.path.join(self.locks_dir, self._url_key(url) + '.lock')
+        give_up_at = time.monotonic() + timeout if timeout is not None else None
+        fd = None
+        acquired = False
+        try:
+            while True:
+                try:
+                    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                except OSError:
+                    fd = None
+                    break
+                
+                while True:
+                    try:
+                        if fcntl is not None:
+                            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        else:
+                            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                        acquired = True
+                        break
+                    except OSError:
+                        if give_up_at is not None and time.monotonic() >= give_up_at:
+                            break
+                        time.sleep(LOCK_POLL_INTERVAL)
+                
+                if not acquired or _is_same_file(fd, lock_path):
+                    break
+                # evict() unlinked the file while we waited for it - whoever opens
+                # the path now gets a new file, so lock that one instead
+                _unlock_file(fd)
+                os.close(fd)
+                fd = None
+                acquired = False
+            yield acquired
+        finally:
+            if fd is not None:
+                if acquired:
+                    _unlock_file(fd)
+                os.close(fd)
+
+    def _remove_lock_file(self, key):
+        """
+        Delete the lock file of an evicted entry, unless a worker holds or waits on it
+
+        The file is only unlinked while we hold its lock, and lock() checks that
+        the file it locked is still the one at the path, so two workers can never
+        end up holding locks on different files for the same URL.
+        """
+        if fcntl is None:
+            # Windows cannot delete open files; the zero-byte lock files just stay
+            return
+        lock_path = os.path.join(self.locks_dir, key + '.lock')
+        try:
+            fd = os.open(lock_path, os.O_RDWR)
+        except OSError:
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            # In use - a download of this URL is under way
+            os.close(fd)
+            return
+        try:
+            if _is_same_file(fd, lock_path):
+                os.remove(lock_path)
+        except OSError:
+            pass
+        finally:
+            _unlock_file(fd)
+            os.close(fd)
+
+    def read(self, entry):
+        """Read the cached bytes for an entry, or None if they were evicted"""
+        try:
+            with open(self._object_path(entry['hash']), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def image_size(self, entry):
+        """Cached (width, height) for an entry, if it was recorded"""
+        if entry.get('width') and entry.get('height'):
+            return entry['width'], entry['height']
+        return None
+
+    def touch(self, url, entry, headers=None):
+        """Mark an entry as recently used, refreshing validators from a 304 response"""
+        if headers:
+            entry.update(_validators_from_headers(headers, entry))
+            entry['validated_at'] = time.time()
+        entry['last_access'] = time.time()
+        try:
+            self._write_json(self._entry_path(url), entry)
+        except OSError as e:
+            print(f"Warning: Could not update image cache entry for {url}: {e}")
+
+    def store(self, url, content, headers, size=None):
+        """Store downloaded bytes for a URL along with its validators and image size"""
+        cache_control = headers.get('Cache-Control', '').lower()
+        if 'no-store' in cache_control:
+            return None
+        
+        content_hash = hashlib.sha256(content).hexdigest()
+        object_path = self._object_path(content_hash)
+        
+        entry = {
+            'url': canonicalize_url(url),
+            'hash': content_hash,
+            'size': len(content),
+            'last_access': time.time(),
+            'validated_at': time.time(),
+        }
+        if size:
+            entry['width'], entry['height'] = size
+        entry.update(_validators_from_headers(headers))
+        
+        try:
+            with self._lock:
+                if not os.path.exists(object_path):
+                    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                    tmp_path = f"{object_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(content)
+                    os.replace(tmp_path, object_path)
+                    if self._total_bytes is not None:
+                        self._total_bytes += len(content)
+                self._write_json(self._entry_path(url), entry)
+            
+            if self._total_bytes is None or self._total_bytes > self.max_bytes:
+                self.evict()
+        except OSError as e:
+            print(f"Warning: Could not write image cache entry for {url}: {e}")
+            return None
+        
+        return entry
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.entries_dir):
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(self.entries_dir, name)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entries.append((path, json.load(f)))
+                except (OSError, ValueError):
+                    continue
+            
+            # Bytes are shared between URLs with identical content, so count each hash once
+            hash_sizes = {entry['hash']: entry['size'] for _, entry in entries}
+            total_bytes = sum(hash_sizes.values())
+            self._total_bytes = total_bytes
+            if total_bytes <= self.max_bytes:
+                return
+            
+            entries.sort(key=lambda item: item[1].get('last_access', 0))
+            hash_refs = {}
+            for _, entry in entries:
+                hash_refs[entry['hash']] = hash_refs.get(entry['hash'], 0) + 1
+            
+            for path, entry in entries:
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._remove_lock_file(os.path.basename(path)[:-len('.json')])
+                hash_refs[entry['hash']] -= 1
+                if hash_refs[entry['hash']] == 0:
+                    try:
+                        os.remove(self._object_path(entry['hash']))
+                    except OSError:
+                        pass
+                    total_bytes -= entry['size']
+            
+            self._total_bytes = total_bytes
+
+
+def _validators_from_headers(headers, previous=None):
+    """Extract ETag, Last-Modified and max-age expiry from response headers"""
+    previous = previous or {}
+    validators = {
+        'etag': headers.get('ETag') or previous.get('etag'),
+        'last_modified': headers.get('Last-Modified') or previous.get('last_modified'),
+        'expires': None,
+    }
+    
+    cache_control = headers.get('Cache-Control', '').lower()
+    max_age = re.search(r'max-age=(\d+)', cache_control)
+    if max_age and 'no-cache' not in cache_control:
+        validators['expires'] = time.time() + int(max_age.group(1))
+    
+    return validators
+
+
+class ImageFetcher:
+    """
+    Connection-pooled HTTP fetcher shared by every image and banner download
+    of a conversion, so images from the same host reuse one TCP/TLS connection
+
+    Args:
+        pool_connections (int): Number of host pools to keep
+        pool_maxsize (int): Maximum connections kept alive per host
+        keep_alive (bool): Reuse connections between requests (default True)
+        timeout (float): Default request timeout in seconds
+        cache (ImageCache): On-disk image cache (defaults to one in DEFAULT_CACHE_DIR;
+            pass False to disable caching)
+        prefetch_workers (int): Maximum parallel downloads during prefetch
+        base_dir (str): Directory relative image paths are resolved against
+            (defaults to the current directory). Local images outside it are refused.
+        allow_outside_base_dir (bool): Also read local images outside base_dir -
+            only for trusted HTML, since any image file on the machine could be embedded
+        max_image_bytes (int): Largest image body accepted, in bytes
+        max_image_pixels (int): Largest image accepted, in pixels (decompression-bomb guard)
+        local_files_max_bytes (int): Memory for local images kept between loads; the
+            least recently used are dropped beyond it
+        max_per_host (int): Maximum concurrent requests to a single host
+        failure_threshold (int): Consecutive failures before a host's circuit opens
+        reset_timeout (float): Seconds before an open circuit allows a trial request
+        retries (int): Extra attempts after a connection error or a 429/5xx response
+        backoff_base (float): First retry delay in seconds; doubles per attempt with full jitter
+        backoff_max (float): Upper bound for a single retry delay in seconds
+        hedge (bool): Send a second request when the first is slower than the host's
+            p95 response time, and use whichever answers first
+        hedge_delay (float): Hedging delay used until a host has enough latency samples
+    
+    A conversion can give the fetcher a time budget with set_deadline(). Once
+    it runs out, remote images that have not arrived raise DeadlineExceededError
+    (so callers fall back to their placeholders) and are listed in degraded,
+    which stays available after clear_deadline() until the next set_deadline().
+    
+    The fetcher also carries an in-memory assets memo that converters use
+    for decoded or pre-scaled images they want to reuse across slides. Like
+    the prefetched downloads it lasts one conversion: clear_prefetched()
+    empties it.
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 keep_alive=True, timeout=DEFAULT_TIMEOUT, cache=None,
+                 prefetch_workers=DEFAULT_PREFETCH_WORKERS, max_per_host=DEFAULT_MAX_PER_HOST,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT,
+                 max_image_bytes=DEFAULT_MAX_IMAGE_BYTES, max_image_pixels=DEFAULT_MAX_IMAGE_PIXELS,
+                 local_files_max_bytes=DEFAULT_LOCAL_FILES_MAX_BYTES,
+                 base_dir=None, allow_outside_base_dir=False, retries=DEFAULT_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX, hedge=True, hedge_delay=DEFAULT_HEDGE_DELAY):
+        self.timeout = timeout
+        self.base_dir = base_dir
+        self.allow_outside_base_dir = allow_outside_base_dir
+        self.keep_alive = keep_alive
+        self.prefetch_workers = prefetch_workers
+        self.max_image_bytes = max_image_bytes
+        self.max_image_pixels = max_image_pixels
+        self.local_files_max_bytes = local_files_max_bytes
+        self.max_per_host = max_per_host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        # Threads for hedged requests, created on first use
+        self._hedge_executor = None
+        self._hedge_executor_lock = threading.Lock()
+        # Circuit breaker state, keyed by host
+        self._circuits = {}
+        self._circuits_lock = threading.Lock()
+        # Local file contents, keyed by path and validated with os.stat, least
+        # recently used first and bounded by local_files_max_bytes
+        self._local_files = OrderedDict()
+        self._local_files_bytes = 0
+        self._local_files_lock = threading.Lock()
+        # Finished downloads from prefetch(), keyed by URL. The generation is
+        # bumped on every clear so late downloads from an abandoned prefetch
+        # cannot leak into the next conversion.
+        self._prefetched = {}
+        self._prefetch_generation = 0
+        self._prefetch_lock = threading.Lock()
+        # Time budget of the current conversion (time.monotonic() value) and
+        # the remote images given up on because of it
+        self.deadline = None
+        self.degraded = []
+        
+        if cache is None:
+            try:
+                cache = ImageCache()
+            except OSError as e:
+                print(f"Warning: Image cache disabled: {e}")
+                cache = False
+        self.cache = cache or None
+        self.assets = {}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Ask the server to drop the connection after each response
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def fetch(self, url, timeout=None):
+        """
+        Load an image source, revalidating cached copies of remote images
+
+        http(s) URLs go through the pooled session. data: URIs are decoded in
+        place and file paths are read from disk, so neither touches the
+        network. Sources already loaded by prefetch() are answered from memory.
+        WebP, AVIF, SVG and animated GIF images come back converted to PNG or JPEG.
+
+        Args:
+            url (str): Image src - an http(s) URL, a data: URI or a file path
+            timeout (float): Request timeout in seconds (defaults to the fetcher timeout)
+
+        Returns:
+            Response object exposing status_code and content
+
+        Raises:
+            DeadlineExceededError: If the time budget ran out before a remote image arrived
+        """
+        with self._prefetch_lock:
+            prefetched = self._prefetched.get(url)
+        try:
+            if prefetched is not None:
+                if isinstance(prefetched, Exception):
+                    raise prefetched
+                return prefetched
+            
+            if self.deadline_passed() and self._is_remote(url):
+                # No time left for the network - a copy on disk is still better than nothing
+                cached = self._cached_copy(url)
+                if cached is not None:
+                    return cached
+                raise DeadlineExceededError(f"Time budget ran out before {url} was loaded")
+            
+            return self._load(url, timeout)
+        except DeadlineExceededError:
+            self._record_degraded(url)
+            raise
+
+    def set_deadline(self, seconds):
+        """
+        Start a time budget for remote image loads and reset the degraded list
+
+        Args:
+            seconds (float): Budget from now, or None for no limit
+        """
+        self.deadline = time.monotonic() + seconds if seconds is not None else None
+        self.degraded = []
+
+    def clear_deadline(self):
+        """Lift the time budget once a conversion ends, keeping degraded for the caller"""
+        self.deadline = None
+
+    def remaining(self):
+        """Seconds left in the time budget, or None without a deadline"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def deadline_passed(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def _record_degraded(self, url):
+        with self._prefetch_lock:
+            if url not in self.degraded:
+                self.degraded.append(url)
+
+    def _is_remote(self, url):
+        return not url.startswith('data:') and not is_local_source(url)
+
+    def _cached_copy(self, url):
+        """Return the cached bytes for a URL regardless of freshness, or None"""
+        entry = self.cache.lookup(absolute_url(url)) if self.cache is not None else None
+        content = self.cache.read(entry) if entry else None
+        if content is None:
+            return None
+        return ImageResponse(content, size=self.cache.image_size(entry))
+
+    def _load(self, url, timeout=None):
+        """Load an image source and convert it to an embeddable format if needed"""
+        response = self._load_source(url, timeout)
+        if response.status_code == 200 and response.content:
+            response = self._normalize(url, response)
+        return response
+
+    def _load_source(self, url, timeout=None):
+        """Dispatch on the kind of image source"""
+        if url.startswith('data:'):
+            return self._load_data_uri(url)
+        if is_local_source(url):
+            return self._load_local_file(url)
+        url = absolute_url(url)
+        
+        # Never wait on the network past the deadline
+        timeout = timeout or self.timeout
+        remaining = self.remaining()
+        if remaining is not None:
+            if remaining <= 0:
+                raise DeadlineExceededError(f"Time budget ran out before {url} was loaded")
+            timeout = min(timeout, remaining)
+        try:
+            return self._download(url, timeout)
+        except requests.Timeout as e:
+            if self.deadline_passed() and not isinstance(e, DeadlineExceededError):
+                raise DeadlineExceededError(f"Time budget ran out while loading {url}") from e
+            raise
+
+    def _normalize(self, url, response):
+        """
+        Convert WebP, AVIF, SVG and animated GIF images to PNG or JPEG
+
+        Conversions are cached by the SHA-256 of the source bytes, so the same
+        image is only transcoded once even if it comes from several URLs.
+        """
+        content = response.content
+        image_type = sniff_image_type(content[:SNIFF_BYTES])
+        if not needs_normalization(content, image_type):
+            return response
+        
+        label = url if len(url) <= 80 else url[:40] + '...'
+        cache_key = 'normalized:' + hashlib.sha256(content).hexdigest()
+        if self.cache is not None:
+            entry = self.cache.lookup(cache_key)
+            converted = self.cache.read(entry) if entry else None
+            if converted is not None:
+                self.cache.touch(cache_key, entry)
+                return ImageResponse(converted, response.status_code, response.headers,
+                                     self.cache.image_size(entry))
+        
+        try:
+            converted, size = normalize_image(content, image_type, max_pixels=self.max_image_pixels)
+        except ValueError as e:
+            raise ImageRejectedError(f"{label}: {e}")
+        self._check_pixel_count(label, size)
+        
+        if self.cache is not None:
+            self.cache.store(cache_key, converted, {}, size)
+        return ImageResponse(converted, response.status_code, response.headers, size)
+
+    def _load_data_uri(self, uri):
+        """Decode an inline data: URI straight into an image buffer"""
+        label = uri[:40] + '...'
+        try:
+            content = decode_data_uri(uri)
+        except ValueError as e:
+            raise ImageRejectedError(f"{label}: {e}")
+        
+        if len(content) > self.max_image_bytes:
+            raise ImageRejectedError(f"{label} exceeds the {self.max_image_bytes} byte limit")
+        return ImageResponse(content, size=self._validate_image(label, content))
+
+    def resolve_local_path(self, src):
+        """Resolve a file: URL or a path relative to base_dir"""
+        parts = urlsplit(src)
+        if parts.scheme.lower() == 'file':
+            path = url2pathname(unquote(parts.path))
+        else:
+            path = src
+            # Paths in HTML are often URL-encoded (my%20logo.png)
+            if not os.path.exists(os.path.join(self.base_dir or os.getcwd(), path)):
+                path = unquote(path)
+        return os.path.normpath(os.path.join(self.base_dir or os.getcwd(), path))
+
+    def _inside_base_dir(self, path):
+        """Check that path, with symlinks resolved, lies within base_dir"""
+        root = os.path.realpath(self.base_dir or os.getcwd())
+        try:
+            return os.path.commonpath([root, os.path.realpath(path)]) == root
+        except ValueError:
+            # Different drives on Windows
+            return False
+
+    def _load_local_file(self, src):
+        """Read a local image through mmap, reusing the bytes while the file is unchanged"""
+        path = self.resolve_local_path(src)
+        if not self.allow_outside_base_dir and not self._inside_base_dir(path):
+            raise ImageRejectedError(f"{src} is outside {self.base_dir or os.getcwd()}")
+        try:
+            stat = os.stat(path)
+        except OSError:
+            print(f"Local image not found: {path}")
+            return ImageResponse(b'', status_code=404)
+        
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._local_files_lock:
+            cached = self._local_files.get(path)
+            if cached is not None:
+                self._local_files.move_to_end(path)
+        if cached is not None and cached[0] == signature:
+            return ImageResponse(cached[1], size=cached[2])
+        
+        if stat.st_size > self.max_image_bytes:
+            raise ImageRejectedError(f"{path} is {stat.st_size} bytes, limit is {self.max_image_bytes}")
+        if stat.st_size == 0:
+            raise ImageRejectedError(f"{path} is empty")
+        
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                content = mapped[:]
+        
+        image_size = self._validate_image(path, content)
+        self._remember_local_file(path, (signature, content, image_size))
+        return ImageResponse(content, size=image_size)
+
+    def _remember_local_file(self, path, entry):
+        """Keep a local file's bytes, dropping the least recently used beyond the byte limit"""
+        with self._local_files_lock:
+            previous = self._local_files.pop(path, None)
+            if previous is not None:
+                self._local_files_bytes -= len(previous[1])
+            if len(entry[1]) > self.local_files_max_bytes:
+                return
+            self._local_files[path] = entry
+            self._local_files_bytes += len(entry[1])
+            while self._local_files_bytes > self.local_files_max_bytes:
+                _, evicted = self._local_files.popitem(last=False)
+                self._local_files_bytes -= len(evicted[1])
+
+    def _validate_image(self, label, content):
+        """Apply the signature and pixel-count checks to a complete image, returning its size"""
+        if sniff_image_type(content[:SNIFF_BYTES]) is None:
+            raise ImageRejectedError(f"{label} is not a supported image")
+        
+        image_size = probe_image_size(content) or self._probe_with_pil(label, content)
+        if image_size is not None:
+            self._check_pixel_count(label, image_size)
+        return image_size
+
+    def _circuit(self, host):
+        with self._circuits_lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                circuit = HostCircuit(self.max_per_host, self.failure_threshold, self.reset_timeout)
+                self._circuits[host] = circuit
+            return circuit
+
+    def _request_with_retries(self, url, timeout, headers=None):
+        """
+        Send a GET, retrying transient failures with jittered exponential backoff
+
+        Connection errors, dropped bodies and 429/5xx responses are retried up to
+        self.retries times. Read timeouts are not - a slow host is handled by
+        hedging instead of waiting out the full timeout again. Open circuits,
+        rejected images and the conversion deadline end the attempts at once.
+        
+        A fetch counts as one failure towards the host's circuit breaker, however
+        many attempts it took, so one broken URL cannot open the circuit for
+        every other image on its host.
+        """
+        circuit = self._circuit(urlsplit(url).netloc.lower())
+        for attempt in range(self.retries + 1):
+            response = error = None
+            try:
+                response = self._send(url, timeout, headers)
+            except (CircuitOpenError, DeadlineExceededError):
+                raise
+            except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                error = e
+            except requests.RequestException:
+                circuit.record_failure()
+                raise
+            
+            failed = error is not None or response.status_code >= 500
+            retry = error is not None or response.status_code in RETRY_STATUSES
+            if retry and attempt < self.retries:
+                # Full jitter spreads the retries of many workers hitting the same CDN
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+                if retry_after.isdigit():
+                    delay = max(delay, min(int(retry_after), self.backoff_max))
+                
+                remaining = self.remaining()
+                if remaining is not None and delay >= remaining:
+                    retry = False
+            else:
+                retry = False
+            
+            if failed:
+                # Only the attempt that ends the fetch counts towards the threshold
+                circuit.record_failure(counted=not retry)
+            if not retry:
+                break
+            
+            circuit.record_retry()
+            print(f"Retrying {url} in {delay:.2f}s ({error or response.status_code})")
+            time.sleep(delay)
+        
+        if error is not None:
+            raise error
+        return response
+
+    def _send(self, url, timeout, headers=None):
+        """Send one attempt, hedged when the first request is slower than usual"""
+        if not self.hedge:
+            return self._request(url, timeout, headers)
+        
+        circuit = self._circuit(urlsplit(url).netloc.lower())
+        delay = circuit.hedge_delay(self.hedge_delay)
+        remaining = self.remaining()
+        if delay >= timeout or (remaining is not None and delay >= remaining):
+            return self._request(url, timeout, headers)
+        
+        executor = self._get_hedge_executor()
+        primary = executor.submit(self._request, url, timeout, headers)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        
+        # The first request is in the slow tail - race a second one against it
+        circuit.record_hedge()
+        hedged = executor.submit(self._request, url, timeout, headers)
+        pending = {primary, hedged}
+        response = error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if response.status_code < 500:
+                    if future is hedged:
+                        circuit.record_hedge(won=True)
+                    # The loser finishes in the background and is discarded
+                    return response
+        
+        if response is not None:
+            return response
+        raise error
+
+    def _get_hedge_executor(self):
+        with self._hedge_executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=max(2, self.prefetch_workers * 2),
+                    thread_name_prefix='image-hedge'
+                )
+            return self._hedge_executor
+
+    def _request(self, url, timeout, headers=None):
+        """Send a GET through the host's concurrency limit and circuit breaker"""
+        host = urlsplit(url).netloc.lower()
+        circuit = self._circuit(host)
+        if not circuit.allow_request():
+            raise CircuitOpenError(f"Circuit open for {host}")
+        
+        with circuit.semaphore:
+            started = time.monotonic()
+            try:
+                response = self.session.get(url, stream=True, timeout=timeout, headers=headers)
+                try:
+                    # Read the body while holding the host slot
+                    content, size = b'', None
+                    if response.status_code == 200:
+                        content, size = self._read_image_body(url, response)
+                finally:
+                    response.close()
+            except DeadlineExceededError:
+                # Our own budget ran out - that says nothing about the host
+                circuit.abandon_trial()
+                raise
+            except (requests.Timeout, requests.ConnectionError) as e:
+                # A timeout cut short by the deadline is not the host's fault either
+                if self.deadline_passed() and _is_timeout(e):
+                    circuit.abandon_trial()
+                    raise DeadlineExceededError(f"Time budget ran out while loading {url}") from e
+                raise
+            except ImageRejectedError:
+                # The host answered; it is the image that is refused
+                circuit.record_success()
+                raise
+        
+        # Failures (exceptions and 5xx) are recorded once per fetch by _request_with_retries
+        if response.status_code in (200, 304):
+            circuit.record_success(time.monotonic() - started)
+        elif response.status_code < 500:
+            circuit.record_success()
+        
+        return ImageResponse(content, response.status_code, response.headers, size)
+
+    def _read_image_body(self, url, response):
+        """
+        Stream an image body, stopping early on non-image content or oversized bodies
+
+        The dimensions are read from the header as soon as it arrives, so
+        decompression bombs are refused before the rest is downloaded.
+
+        Returns:
+            tuple: (content bytes, (width, height) or None)
+
+        Raises:
+            ImageRejectedError: If the body is not a supported image or exceeds the limits
+        """
+        content_length = response.headers.get('Content-Length')
+        if content_length and content_length.isdigit() and int(content_length) > self.max_image_bytes:
+            raise ImageRejectedError(f"{url} is {content_length} bytes, limit is {self.max_image_bytes}")
+        
+        # Keep the chunks and join them once at the end: a single copy into the
+        # immutable bytes object that every consumer then shares
+        chunks = []
+        length = 0
+        head = b''
+        image_size = None
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            chunks.append(chunk)
+            length += len(chunk)
+            
+            # Check the signature as soon as the first bytes arrive
+            if len(head) < SNIFF_BYTES:
+                head += chunk[:SNIFF_BYTES - len(head)]
+                if len(head) >= SNIFF_BYTES and sniff_image_type(head) is None:
+                    raise ImageRejectedError(f"{url} is not a supported image")
+            
+            # Look for the dimensions in the header bytes received so far
+            if image_size is None and length <= PROBE_LIMIT_BYTES:
+                image_size = probe_image_size(b''.join(chunks))
+                if image_size is not None:
+                    self._check_pixel_count(url, image_size)
+            
+            if length > self.max_image_bytes:
+                raise ImageRejectedError(f"{url} exceeds the {self.max_image_bytes} byte limit")
+            
+            # A slow host can trickle data without ever tripping the read timeout
+            if self.deadline_passed():
+                raise DeadlineExceededError(f"Time budget ran out while downloading {url}")
+        
+        if len(head) < SNIFF_BYTES and sniff_image_type(head) is None:
+            raise ImageRejectedError(f"{url} is not a supported image")
+        
+        content = b''.join(chunks)
+        del chunks
+        
+        if image_size is None:
+            image_size = self._probe_with_pil(url, content)
+            if image_size is not None:
+                self._check_pixel_count(url, image_size)
+        
+        return content, image_size
+
+    def _probe_with_pil(self, url, content):
+        """Header-only PIL fallback for files the fast probe does not understand"""
+        try:
+            # PIL only parses the header here; pixel data is decoded lazily
+            with PILImage.open(BytesIO(content)) as pil_img:
+                return pil_img.size
+        except PILImage.DecompressionBombError as e:
+            raise ImageRejectedError(f"{url}: {e}")
+        except Exception:
+            # Leave undecodable data for the layout code to report
+            return None
+
+    def _check_pixel_count(self, url, image_size):
+        """Reject decompression bombs from the header size, before any pixels are decoded"""
+        width, height = image_size
+        if width * height > self.max_image_pixels:
+            raise ImageRejectedError(
+                f"{url} is {width}x{height} pixels, limit is {self.max_image_pixels}"
+            )
+
+    def _download(self, url, timeout=None):
+        timeout = timeout or self.timeout
+        if self.cache is None:
+            return self._revalidate(url, timeout, None)
+        
+        response = self._fresh_from_cache(url)
+        if response is not None:
+            return response
+        
+        # Only one worker downloads a URL at a time; the others wait here and
+        # then pick up what it stored instead of downloading it again
+        waiting_since = time.time()
+        with self.cache.lock(url, timeout):
+            response = self._fresh_from_cache(url, validated_since=waiting_since)
+            if response is not None:
+                return response
+            return self._revalidate(url, timeout, self.cache.lookup(url))
+
+    def _fresh_from_cache(self, url, validated_since=None):
+        """Serve a cached copy that needs no request, or return None"""
+        entry = self.cache.lookup(url)
+        if entry and self.cache.is_fresh(entry, validated_since):
+            content = self.cache.read(entry)
+            if content is not None:
+                self.cache.touch(url, entry)
+                return ImageResponse(content, size=self.cache.image_size(entry))
+        return None
+
+    def _revalidate(self, url, timeout, entry):
+        """Download a URL, sending the cached validators for a conditional GET"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        
+        try:
+            response = self._request_with_retries(url, timeout, headers)
+            if response.status_code == 304 and entry:
+                content = self.cache.read(entry)
+                if content is not None:
+                    self.cache.touch(url, entry, response.headers)
+                    return ImageResponse(content, headers=response.headers, size=self.cache.image_size(entry))
+                # The bytes were evicted underneath us - download them again
+                response = self._request_with_retries(url, timeout)
+        except CircuitOpenError as e:
+            # The host is failing - serve a stale copy if we have one, otherwise fail fast
+            content = self.cache.read(entry) if entry else None
+            if content is not None:
+                return ImageResponse(content, size=self.cache.image_size(entry))
+            print(f"Skipping {url}: {e}")
+            return ImageResponse(b'', status_code=503)
+        
+        if self.cache is None:
+            return response
+        
+        if response.status_code == 200:
+            self.cache.store(url, response.content, response.headers, response.size)
+        
+        return response
+
+    def prefetch(self, urls):
+        """
+        Load image sources in parallel on a bounded thread pool
+
+        Later fetch() calls for these URLs return the finished result without
+        blocking on the network. Failures are kept and re-raised by fetch(),
+        so callers still fall back to their placeholders. With a deadline set,
+        this returns when the budget runs out even if downloads are still in
+        flight; those finish in the background and their results are dropped.
+
+        Args:
+            urls (iterable): Image sources to load
+        """
+        pending = []
+        seen = set()
+        with self._prefetch_lock:
+            for url in urls:
+                if url and url not in self._prefetched and url not in seen:
+                    seen.add(url)
+                    pending.append(url)
+        
+            generation = self._prefetch_generation
+        
+        if not pending:
+            return
+        
+        def download(url):
+            try:
+                result = self._load(url)
+            except Exception as e:
+                result = e
+            with self._prefetch_lock:
+                if self._prefetch_generation == generation:
+                    self._prefetched[url] = result
+        
+        print(f"Prefetching {len(pending)} images")
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.prefetch_workers, len(pending))))
+        futures = [executor.submit(download, url) for url in pending]
+        _, outstanding = wait(futures, timeout=self.remaining())
+        # Don't block on stragglers once the budget is spent
+        executor.shutdown(wait=not outstanding, cancel_futures=True)
+        if outstanding:
+            print(f"Time budget ran out with {len(outstanding)} images still loading")
+
+    def metrics(self):
+        """
+        Report per-host request counts and circuit breaker state
+
+        Returns:
+            dict: Host name mapped to its state, failures, requests and skipped counts
+        """
+        with self._circuits_lock:
+            circuits = dict(self._circuits)
+        return {host: circuit.metrics() for host, circuit in circuits.items()}
+
+    def release(self, urls):
+        """
+        Drop the prefetched images of sources that are no longer needed
+
+        Failures are kept, so a source used again later fails the same way
+        instead of being retried against a host that is already known to be down.
+        """
+        with self._prefetch_lock:
+            for url in urls:
+                if not isinstance(self._prefetched.get(url), Exception):
+                    self._prefetched.pop(url, None)
+
+    def clear_prefetched(self):
+        """Drop prefetched results and the assets memo once a conversion is finished"""
+        with self._prefetch_lock:
+            self._prefetched.clear()
+            self._prefetch_generation += 1
+        # A banner that failed this time gets another chance in the next conversion
+        self.assets.clear()
+
+    def close(self):
+        """Close all pooled connections"""
+        self.clear_prefetched()
+        with self._hedge_executor_lock:
+            if self._hedge_executor is not None:
+                self._hedge_executor.shutdown(wait=False, cancel_futures=True)
+                self._hedge_executor = None
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_default_fetcher = None
+_default_fetcher_pid = None
+
+
+def get_default_fetcher():
+    """
+    Return the fetcher shared by this worker process, creating it on first use
+
+    A forked worker gets its own fetcher instead of reusing the parent's sockets.
+    """
+    global _default_fetcher, _default_fetcher_pid
+
+    if _default_fetcher is None or _default_fetcher_pid != os.getpid():
+        _default_fetcher = ImageFetcher()
+        _default_fetcher_pid = os.getpid()
+
+    return _default_fetcher
@@ -0,0 +1,167 @@
+import re
+from io import BytesIO
+from xml.etree import ElementTree
+
+from PIL import Image as PILImage
+
+# Optional decoders - without them SVG and AVIF sources fall back to placeholders
+try:
+    import cairosvg
+except ImportError:
+    cairosvg = None
+
+try:
+    import pillow_avif  # noqa: F401 - registers the AVIF plugin with Pillow
+except ImportError:
+    pass
+
+# Formats PowerPoint cannot embed (or animates when it shouldn't) and that are
+# converted to PNG or JPEG before they reach add_picture
+CONVERTED_FORMATS = {'webp', 'avif', 'svg'}
+# Width SVGs are rasterized at; the optimizer later scales them to their placed size
+SVG_RASTER_WIDTH = 1600
+NORMALIZED_JPEG_QUALITY = 90
+# CSS pixels per unit of an absolute SVG length
+SVG_UNITS = {'': 1.0, 'px': 1.0, 'pt': 4 / 3, 'pc': 16.0, 'in': 96.0, 'cm': 96 / 2.54, 'mm': 96 / 25.4}
+SVG_LENGTH_PATTERN = re.compile(r'\s*([0-9]*\.?[0-9]+(?:[eE][+-]?[0-9]+)?)\s*([a-z]*)\s*$')
+
+
+def needs_normalization(data, image_type):
+    """
+    Check whether an image has to be converted before it can be embedded
+
+    Args:
+        data (bytes): Encoded image
+        image_type (str): Format from sniff_image_type
+
+    Returns:
+        bool: True for WebP, AVIF, SVG and animated GIF sources
+    """
+    if image_type in CONVERTED_FORMATS:
+        return True
+
+    if image_type == 'gif':
+        try:
+            with PILImage.open(BytesIO(data)) as img:
+                return getattr(img, 'is_animated', False)
+        except Exception:
+            return False
+
+    return False
+
+
+def _svg_length(value):
+    """An absolute SVG length in CSS pixels, or None for missing, relative or invalid ones"""
+    match = SVG_LENGTH_PATTERN.match(value or '')
+    if not match or match.group(2) not in SVG_UNITS:
+        return None
+    length = float(match.group(1)) * SVG_UNITS[match.group(2)]
+    return length if length > 0 else None
+
+
+def svg_size(data):
+    """
+    Intrinsic size of an SVG from the width, height and viewBox of its root element
+
+    Only the root tag is parsed, so this is cheap even for huge documents.
+
+    Args:
+        data (bytes): SVG document
+
+    Returns:
+        tuple: (width, height) in CSS pixels, or None if the SVG does not say
+    """
+    try:
+        _, root = next(ElementTree.iterparse(BytesIO(data), events=('start',)))
+    except (ElementTree.ParseError, StopIteration):
+        return None
+
+    width = _svg_length(root.get('width'))
+    height = _svg_length(root.get('height'))
+    if width and height:
+        return width, height
+
+    try:
+        _, _, view_width, view_height = (float(v) for v in re.split(r'[\s,]+', root.get('viewBox', '').strip()))
+    except ValueError:
+        return None
+    if view_width <= 0 or view_height <= 0:
+        return None
+    # A single given dimension keeps the viewBox's aspect ratio
+    if width:
+        return width, width * view_height / view_width
+    if height:
+        return height * view_width / view_height, height
+    return view_width, view_height
+
+
+def svg_raster_size(data):
+    """
+    Size an SVG is rasterized at: SVG_RASTER_WIDTH wide, keeping its aspect ratio
+
+    SVGs that do not state their size are rasterized into a square.
+
+    Args:
+        data (bytes): SVG document
+
+    Returns:
+        tuple: (width, height) in pixels
+    """
+    size = svg_size(data)
+    if size is None:
+        return SVG_RASTER_WIDTH, SVG_RASTER_WIDTH
+    width, height = size
+    return SVG_RASTER_WIDTH, max(1, round(SVG_RASTER_WIDTH * height / width))
+
+
+def normalize_image(data, image_type, max_pixels=None):
+    """
+    Convert an image to PNG or JPEG, keeping only the first frame of animations
+
+    Images with transparency become PNG; opaque photos (WebP, AVIF) become JPEG.
+
+    Args:
+        data (bytes): Encoded image
+        image_type (str): Format from sniff_image_type
+        max_pixels (int): Largest width * height an SVG may be rasterized at
+            (optional). Checked before cairosvg allocates anything, since a
+            long thin SVG scaled to SVG_RASTER_WIDTH can need gigabytes.
+
+    Returns:
+        tuple: (encoded bytes, (width, height))
+
+    Raises:
+        ValueError: If the image cannot be decoded or is over max_pixels
+    """
+    if image_type == 'svg':
+        if cairosvg is None:
+            raise ValueError("SVG images need the cairosvg package")
+        output_width, output_height = svg_raster_size(data)
+        if max_pixels is not None and output_width * output_height > max_pixels:
+            raise ValueError(f"SVG would rasterize to {output_width}x{output_height} pixels, "
+                             f"over the {max_pixels} pixel limit")
+        try:
+            # Both dimensions are given so cairosvg cannot size the canvas on its own
+            data = cairosvg.svg2png(bytestring=data, output_width=output_width, output_height=output_height)
+        except Exception as e:
+            raise ValueError(f"Could not rasterize SVG: {e}")
+
+    try:
+        with PILImage.open(BytesIO(data)) as img:
+            # First frame only - PowerPoint would otherwise play the animation
+            img.seek(0)
+            has_alpha = img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+            frame = img.convert('RGBA' if has_alpha else 'RGB')
+    except Exception as e:
+        if image_type == 'avif':
+            raise ValueError(f"Could not decode AVIF image (is pillow-avif-plugin installed?): {e}")
+        raise ValueError(f"Could not decode {image_type} image: {e}")
+
+    output = BytesIO()
+    if has_alpha or image_type in ('gif', 'svg'):
+        # Flat graphics compress better (and stay sharp) as PNG
+        frame.save(output, format='PNG', optimize=True)
+    else:
+        frame.save(output, format='JPEG', quality=NORMALIZED_JPEG_QUALITY)
+
+    return output.getvalue(), frame.size
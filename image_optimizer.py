@@ -0,0 +1,138 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from PIL import Image as PILImage
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.util import Inches
+
+# Resolution pictures are resampled to, relative to their placed size on the slide
+DEFAULT_TARGET_DPI = 150
+DEFAULT_JPEG_QUALITY = 85
+DEFAULT_OPTIMIZE_WORKERS = 4
+# Only re-encode when the source is at least this much larger than needed
+DOWNSCALE_THRESHOLD = 1.2
+
+
+def target_pixel_size(width_emu, height_emu, dpi=DEFAULT_TARGET_DPI):
+    """Convert a placed size in EMU to the pixel size needed at the given DPI"""
+    return (
+        max(1, math.ceil(width_emu / Inches(1) * dpi)),
+        max(1, math.ceil(height_emu / Inches(1) * dpi))
+    )
+
+
+def optimize_image(blob, target_width, target_height, jpeg_quality=DEFAULT_JPEG_QUALITY):
+    """
+    Downscale and recompress an image to the pixel size it is displayed at
+
+    The aspect ratio is kept and the result is never smaller than the target
+    in either direction. JPEG sources use draft mode so the decoder scales
+    down in the DCT domain instead of decoding every source pixel.
+
+    Args:
+        blob (bytes): Encoded source image
+        target_width (int): Needed width in pixels
+        target_height (int): Needed height in pixels
+        jpeg_quality (int): Quality for JPEG output
+
+    Returns:
+        bytes: The re-encoded image, or None if it would not get smaller
+    """
+    with PILImage.open(BytesIO(blob)) as img:
+        source_width, source_height = img.size
+        scale = max(target_width / source_width, target_height / source_height)
+        if scale * DOWNSCALE_THRESHOLD > 1:
+            return None
+
+        # Leave animations alone - resizing would keep only the first frame
+        if getattr(img, 'is_animated', False):
+            return None
+
+        new_size = (max(1, round(source_width * scale)), max(1, round(source_height * scale)))
+        source_format = img.format
+
+        if source_format == 'JPEG':
+            img.draft('RGB', new_size)
+
+        has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+        resized = img.convert('RGBA' if has_alpha else 'RGB').resize(new_size, PILImage.LANCZOS)
+
+    output = BytesIO()
+    if source_format == 'JPEG' or (source_format == 'BMP' and not has_alpha):
+        resized.save(output, format='JPEG', quality=jpeg_quality, optimize=True)
+    else:
+        resized.save(output, format='PNG', optimize=True)
+
+    optimized = output.getvalue()
+    return optimized if len(optimized) < len(blob) else None
+
+
+def optimize_presentation_images(prs, target_dpi=DEFAULT_TARGET_DPI, jpeg_quality=DEFAULT_JPEG_QUALITY,
+                                 max_workers=DEFAULT_OPTIMIZE_WORKERS):
+    """
+    Resample every picture in a presentation to its placed size before saving
+
+    Pictures are grouped by source image and placed pixel size, transcoded on
+    a thread pool, and then re-pointed at the smaller image part. Source parts
+    that are no longer referenced are left out of the saved file.
+
+    Args:
+        prs: The Presentation object
+        target_dpi (int): Resolution relative to the placed size
+        jpeg_quality (int): Quality for JPEG output
+        max_workers (int): Transcoding threads
+
+    Returns:
+        dict: Counts and byte totals before and after optimization
+    """
+    # (image part, target size) -> pictures placed at that size
+    jobs = {}
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if shape.shape_type != MSO_SHAPE_TYPE.PICTURE:
+                continue
+            rId = shape._element.blip_rId
+            if rId is None:
+                continue
+            image_part = slide.part.related_part(rId)
+            size = target_pixel_size(shape.width, shape.height, target_dpi)
+            jobs.setdefault((image_part, size), []).append((slide, shape))
+
+    stats = {'pictures': 0, 'bytes_before': 0, 'bytes_after': 0}
+    if not jobs:
+        return stats
+
+    def transcode(key):
+        image_part, (width, height) = key
+        try:
+            return optimize_image(image_part.blob, width, height, jpeg_quality)
+        except Exception as e:
+            print(f"Warning: Could not optimize image {image_part.partname}: {e}")
+            return None
+
+    keys = list(jobs)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as executor:
+        results = list(executor.map(transcode, keys))
+
+    touched_parts = set()
+    for key, optimized in zip(keys, results):
+        if optimized is None:
+            continue
+        image_part = key[0]
+        stats['bytes_before'] += len(image_part.blob)
+        stats['bytes_after'] += len(optimized)
+
+        for slide, shape in jobs[key]:
+            new_part, new_rId = slide.part.get_or_add_image_part(BytesIO(optimized))
+            shape._element.blipFill.blip.rEmbed = new_rId
+            touched_parts.add(slide.part)
+            stats['pictures'] += 1
+
+    # Drop relationships to source images that no picture points at anymore
+    for slide_part in touched_parts:
+        embedded = set(slide_part._element.xpath('//a:blip/@r:embed'))
+        for rel in list(slide_part.rels):
+            if rel.reltype.endswith('/image') and rel.rId not in embedded:
+                slide_part.drop_rel(rel.rId)
+
+    return stats
@@ -1,4 +1,3 @@
-from bs4 import BeautifulSoup
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
@@ -11,16 +10,24 @@ from jinja2 import Template,Environment, FileSystemLoader
 import json
 import os
 import sys
-import requests
 import re
 import html
 import sys
 import os
 import argparse
+import time
+from image_fetcher import DeadlineExceededError, ImageFetcher, get_default_fetcher, get_image_size
+from image_optimizer import DEFAULT_TARGET_DPI, optimize_presentation_images
+from pptx_writer import DEFAULT_XML_COMPRESSLEVEL, save_presentation
+from slide_ir import RemainingRows, compile_slide, compile_slides
+from html_parsing import iter_slide_divs, parse_html, resolve_parser
+from document_cache import DocumentCache, compiler_version
 # Standard slide dimensions in inches
 SLIDE_WIDTH_INCHES = 10
 SLIDE_HEIGHT_INCHES = 7.5
 FOOTER_HEIGHT_INCHES = 0.5
+# Resolution used when pre-scaling the banner to its box
+BANNER_DPI = 150
 
 
 def render_template_with_jinja(template_html, json_data):
@@ -42,7 +49,61 @@ def render_template_with_jinja(template_html, json_data):
     rendered_html = template.render(**json_data)
     
     return rendered_html
-def add_banner_to_slide(slide, banner_url=None, title_height=Inches(1.4)):
+def get_banner_image(banner_url, banner_width, banner_height, fetcher=None):
+    """
+    Download, decode and pre-scale the banner once per conversion
+    
+    The prepared bytes are memoized on the fetcher, so every slide (including
+    continuation slides) embeds the identical blob and python-pptx reuses a
+    single image part for the whole deck.
+    
+    Args:
+        banner_url (str): URL of the banner image
+        banner_width: Width of the banner box in EMU
+        banner_height: Height of the banner box in EMU
+        fetcher: ImageFetcher used to download the banner (optional)
+    
+    Returns:
+        bytes: Encoded banner image, or None if it could not be loaded
+    """
+    fetcher = fetcher or get_default_fetcher()
+    memo_key = ('banner', banner_url, int(banner_width), int(banner_height))
+    if memo_key in fetcher.assets:
+        return fetcher.assets[memo_key]
+    
+    banner_image = None
+    try:
+        # Download the image with timeout
+        response = fetcher.fetch(banner_url, timeout=15)
+        
+        if response.status_code == 200:
+            try:
+                with PILImage.open(BytesIO(response.content)) as pil_img:
+                    # Scale to the box size - the banner is stretched to fill it anyway
+                    box_size = (
+                        max(1, round(banner_width / Inches(1) * BANNER_DPI)),
+                        max(1, round(banner_height / Inches(1) * BANNER_DPI))
+                    )
+                    has_alpha = pil_img.mode in ('RGBA', 'LA', 'P')
+                    scaled = pil_img.convert('RGBA' if has_alpha else 'RGB').resize(box_size, PILImage.LANCZOS)
+                    
+                    output = BytesIO()
+                    if pil_img.format == 'JPEG' and not has_alpha:
+                        scaled.save(output, format='JPEG', quality=90)
+                    else:
+                        scaled.save(output, format='PNG', optimize=True)
+                    banner_image = output.getvalue()
+            except Exception as img_error:
+                print(f"Error decoding banner image: {img_error}. Using default banner instead.")
+        else:
+            print(f"Failed to download banner image (status {response.status_code}). Using default banner.")
+    except Exception as request_error:
+        print(f"Error downloading banner image: {request_error}. Using default banner instead.")
+    
+    # Remember failures too, so a broken banner is not retried on every slide
+    fetcher.assets[memo_key] = banner_image
+    return banner_image
+def add_banner_to_slide(slide, banner_url=None, title_height=Inches(1.4), fetcher=None):
     """
     Add a banner to the top of the slide - either from URL or default light blue
     
@@ -50,6 +111,7 @@ def add_banner_to_slide(slide, banner_url=None, title_height=Inches(1.4)):
         slide: The PowerPoint slide to add the banner to
         banner_url: URL of the banner image (optional)
         title_height: Height position where content starts (default 1.5 inches)
+        fetcher: ImageFetcher used to download the banner (optional)
     
     Returns:
         None
@@ -61,51 +123,44 @@ def add_banner_to_slide(slide, banner_url=None, title_height=Inches(1.4)):
     banner_height = title_height  # Height from top to where content starts
     
     if banner_url and banner_url.strip():
-        # Try to download and use the banner image from URL
-        try:
-            # Download the image with timeout
-            response = requests.get(banner_url, stream=True, timeout=15)
+        # Fetched and scaled once per conversion, then reused on every slide
+        banner_image = get_banner_image(banner_url, banner_width, banner_height, fetcher)
+        
+        if banner_image is not None:
+            img_bytes = BytesIO(banner_image)
             
-            if response.status_code == 200:
-                # Create image from content
-                img_bytes = BytesIO(response.content)
+            try:
+                # Try to add the image as banner
+                banner = slide.shapes.add_picture(
+                    img_bytes, 
+                    banner_left, 
+                    banner_top, 
+                    width=banner_width,
+                    height=banner_height
+                )
                 
-                try:
-                    # Try to add the image as banner
-                    banner = slide.shapes.add_picture(
-                        img_bytes, 
-                        banner_left, 
-                        banner_top, 
-                        width=banner_width,
-                        height=banner_height
-                    )
-                    
-                    print(f"Added banner from URL: {banner_url}")
-                    
-                    # Add Infosys text to top right corner
-                    text_box = slide.shapes.add_textbox(
-                        Inches(SLIDE_WIDTH_INCHES - 2), Inches(0.2),  # Position at top right
-                        Inches(1.8), Inches(0.5)  # Size of text box
-                    )
-                    text_frame = text_box.text_frame
-                    p = text_frame.add_paragraph()
-                    p.text = "@INFOSYS"
-                    p.font.bold = True
-                    p.font.size = Pt(14)
-                    p.font.color.rgb = RGBColor(0, 51, 102)  # Dark blue color for contrast
-                    p.alignment = PP_ALIGN.RIGHT
-                    
-                    return  # Exit early as we successfully added the banner
-                    
-                except Exception as img_error:
-                    print(f"Error adding banner image: {img_error}. Using default banner instead.")
-                    # Continue to default banner creation below
-                finally:
-                    img_bytes.close()
-            else:
-                print(f"Failed to download banner image (status {response.status_code}). Using default banner.")
-        except Exception as request_error:
-            print(f"Error downloading banner image: {request_error}. Using default banner instead.")
+                print(f"Added banner from URL: {banner_url}")
+                
+                # Add Infosys text to top right corner
+                text_box = slide.shapes.add_textbox(
+                    Inches(SLIDE_WIDTH_INCHES - 2), Inches(0.2),  # Position at top right
+                    Inches(1.8), Inches(0.5)  # Size of text box
+                )
+                text_frame = text_box.text_frame
+                p = text_frame.add_paragraph()
+                p.text = "@INFOSYS"
+                p.font.bold = True
+                p.font.size = Pt(14)
+                p.font.color.rgb = RGBColor(0, 51, 102)  # Dark blue color for contrast
+                p.alignment = PP_ALIGN.RIGHT
+                
+                return  # Exit early as we successfully added the banner
+                
+            except Exception as img_error:
+                print(f"Error adding banner image: {img_error}. Using default banner instead.")
+                # Continue to default banner creation below
+            finally:
+                img_bytes.close()
     
     # If URL is not provided or any error occurred, create the default banner
     # Create banner shape - IMPORTANT: Add this FIRST before any other content
@@ -161,6 +216,22 @@ def render_template_file_with_jinja(template_path, json_data, template_dir=None)
     rendered_html = template.render(**json_data)
     
     return rendered_html
+
+def generate_template_file_with_jinja(template_path, json_data, template_dir=None):
+    """
+    Render a template file piece by piece, like render_template_file_with_jinja
+    
+    Args:
+        template_path (str): Path to the template file (relative to template_dir)
+        json_data (dict): JSON data to fill the placeholders
+        template_dir (str): Directory containing template files
+        
+    Returns:
+        generator: Chunks of rendered HTML, produced as the template runs
+    """
+    env = Environment(loader=FileSystemLoader(template_dir or '.'))
+    return env.get_template(template_path).generate(**json_data)
+
 def generate_ppt_from_json_string_and_template_string(template_html, json_string, output_pptx="presentation.pptx"):
     """
     Generate a PowerPoint presentation from JSON string and HTML template string
@@ -189,7 +260,8 @@ def generate_ppt_from_json_string_and_template_string(template_html, json_string
     except Exception as e:
         print(f"Error generating PowerPoint: {e}")
         raise
-def generate_ppt_from_json_and_template(template_file, json_file, output_pptx="presentation.pptx", banner_url=None):
+def generate_ppt_from_json_and_template(template_file, json_file, output_pptx="presentation.pptx", banner_url=None, fetcher=None,
+                                        deadline=None, stream=False, return_report=False):
     """
     Generate a PowerPoint presentation from a JSON file and HTML template
     
@@ -198,9 +270,17 @@ def generate_ppt_from_json_and_template(template_file, json_file, output_pptx="p
         json_file (str): Path to the JSON data file
         output_pptx (str): Path to save the PowerPoint file
         banner_url (str): URL for the banner image (optional)
+        fetcher (ImageFetcher): Shared image fetcher, e.g. one per worker process (optional)
+        deadline (float): Seconds allowed for image downloads before the remaining
+            images are replaced by placeholders (optional, see html_to_pptx)
+        stream (bool): Convert slides while the template is still rendering, for
+            decks too large to hold in memory (see html_to_pptx)
+        return_report (bool): Return html_to_pptx's report instead of the path, so
+            callers can tell which images were degraded to placeholders
         
     Returns:
-        str: Path to the generated PowerPoint file
+        str: Path to the generated PowerPoint file, or the report dict with
+            return_report (its 'output' key holds the path)
     """
     try:
         # Get the template directory (the folder containing the template file)
@@ -211,6 +291,20 @@ def generate_ppt_from_json_and_template(template_file, json_file, output_pptx="p
         with open(json_file, 'r', encoding='utf-8') as f:
             json_data = json.load(f)
         
+        if stream:
+            # Each rendered chunk goes to the temporary file and straight on to the converter
+            with open("temp_rendered.html", 'w', encoding='utf-8') as temp_file:
+                def rendered_chunks():
+                    for chunk in generate_template_file_with_jinja(template_name, json_data, template_dir):
+                        temp_file.write(chunk)
+                        yield chunk
+                
+                report = html_to_pptx(rendered_chunks(), output_pptx, banner_url, fetcher=fetcher,
+                                      base_dir=template_dir, deadline=deadline, stream=True)
+            
+            print(f"Generated PowerPoint presentation: {output_pptx}")
+            return report if return_report else output_pptx
+        
         # Use the file-based Jinja2 rendering
         rendered_html = render_template_file_with_jinja(template_name, json_data, template_dir)
         
@@ -220,18 +314,22 @@ def generate_ppt_from_json_and_template(template_file, json_file, output_pptx="p
             f.write(rendered_html)
         
         # Convert the rendered HTML to PowerPoint using your existing converter
-        html_to_pptx(rendered_html, output_pptx, banner_url)
+        # Relative <img> paths in the template resolve against its directory
+        report = html_to_pptx(rendered_html, output_pptx, banner_url, fetcher=fetcher, base_dir=template_dir,
+                              deadline=deadline)
         
         # Optionally remove the temporary file
         # os.remove(temp_html_file)
         
         print(f"Generated PowerPoint presentation: {output_pptx}")
-        return output_pptx
+        return report if return_report else output_pptx
         
     except Exception as e:
         print(f"Error generating PowerPoint: {e}")
         raise
-def html_to_pptx(html_content, output_filename="presentation.pptx", banner_url=None):
+def html_to_pptx(html_content, output_filename="presentation.pptx", banner_url=None, fetcher=None,
+                 image_dpi=DEFAULT_TARGET_DPI, base_dir=None, deadline=None,
+                 compresslevel=DEFAULT_XML_COMPRESSLEVEL, parser=None, document_cache=None, stream=False):
     """
     Convert HTML to PowerPoint presentation with support for mixed layouts
     
@@ -239,65 +337,212 @@ def html_to_pptx(html_content, output_filename="presentation.pptx", banner_url=N
         html_content (str): HTML content with slides
         output_filename (str): Output PowerPoint file name
         banner_url (str): URL for the banner image (optional)
+        fetcher (ImageFetcher): Pooled fetcher for image downloads (optional).
+            When omitted, one is created for this conversion and closed afterwards.
+        image_dpi (int): Resolution pictures are downscaled to relative to their
+            placed size before saving (None keeps the source images)
+        base_dir (str): Directory that relative <img> paths are resolved against
+            (defaults to the current directory)
+        deadline (float): Time budget in seconds for the conversion (optional).
+            Remote images still outstanding when it runs out get the usual
+            "[Image ...]" placeholders and the deck is saved without waiting.
+        compresslevel (int): Deflate level for the XML parts of the saved file,
+            1 (fastest) to 9 (smallest). Images are always stored uncompressed.
+        parser (str): BeautifulSoup tree builder ('lxml', 'html.parser', ...).
+            Defaults to lxml when installed, otherwise html.parser.
+        document_cache (DocumentCache): Cache of compiled slides keyed by the HTML
+            (defaults to one in DEFAULT_DOCUMENT_CACHE_DIR; pass False to always parse)
+        stream (bool): Parse, render and release one slide at a time instead of
+            parsing the whole document first. html_content may then also be a
+            file object or an iterable of chunks such as Jinja's generate().
+            Images are downloaded per slide and the document cache is not used.
+    
+    Returns:
+        dict: Output file name, elapsed seconds and the image sources that were
+            degraded to placeholders because the deadline ran out
     """
-    # Create a new presentation
-    prs = Presentation()
+    start_time = time.monotonic()
+    # One pooled fetcher per conversion unless the caller shares its own
+    owns_fetcher = fetcher is None
+    if owns_fetcher:
+        fetcher = ImageFetcher(base_dir=base_dir)
+    previous_base_dir = fetcher.base_dir
+    if base_dir is not None:
+        fetcher.base_dir = base_dir
+    fetcher.set_deadline(deadline)
     
-    # Parse HTML content
-    soup = BeautifulSoup(html_content, 'html.parser')
+    try:
+        # Create a new presentation
+        prs = Presentation()
+        
+        if stream:
+            # Slides are compiled as the parser reaches them
+            slides = stream_slides(html_content, parser)
+        else:
+            # Parse and compile the HTML - or reuse the slides compiled from it last time
+            slides = compile_document(html_content, parser, document_cache)
+            
+            # Download every image (and the banner) in parallel before layout
+            fetcher.prefetch(collect_image_urls(slides, banner_url))
+        
+        # Process each slide based on its content
+        for slide_index, slide in enumerate(slides):
+            if stream:
+                # Only this slide's images are known yet - load them in parallel
+                slide_urls = collect_image_urls([slide], banner_url)
+                fetcher.prefetch(slide_urls)
+            
+            if slide.has_columns:
+                # Process as column layout
+                process_column_slide(slide, prs, slide_index, banner_url, fetcher)
+            else:
+                # Process as standard layout
+                process_standard_slide(slide, prs, slide_index, banner_url, fetcher)
+            
+            if stream:
+                # The pictures are in the presentation now; keep only the banner
+                fetcher.release(url for url in slide_urls if url != banner_url)
+        
+        # Shrink pictures to the size they are displayed at - unless we're already out of time
+        if image_dpi and not fetcher.deadline_passed():
+            stats = optimize_presentation_images(prs, target_dpi=image_dpi)
+            if stats['pictures']:
+                print(f"Optimized {stats['pictures']} pictures: "
+                      f"{stats['bytes_before'] / 1024:.0f} KB -> {stats['bytes_after'] / 1024:.0f} KB")
+        
+        # Save the presentation
+        save_presentation(prs, output_filename, compresslevel)
+        print(f"Presentation saved as {output_filename}")
+        
+        # Report image hosts that were skipped because their circuit opened
+        for host, host_metrics in fetcher.metrics().items():
+            if host_metrics['state'] != 'closed' or host_metrics['skipped']:
+                print(f"Image host {host}: circuit {host_metrics['state']}, "
+                      f"{host_metrics['failures']} failures, {host_metrics['skipped']} requests skipped")
+            if host_metrics['retries'] or host_metrics['hedges']:
+                print(f"Image host {host}: {host_metrics['retries']} retries, "
+                      f"{host_metrics['hedge_wins']} of {host_metrics['hedges']} hedged requests won")
+        
+        report = {
+            'output': output_filename,
+            'elapsed': time.monotonic() - start_time,
+            'degraded': list(fetcher.degraded)
+        }
+        if report['degraded']:
+            print(f"{len(report['degraded'])} images replaced by placeholders after the "
+                  f"{deadline}s deadline: {', '.join(src[:80] for src in report['degraded'])}")
+        return report
+    finally:
+        fetcher.clear_deadline()
+        if owns_fetcher:
+            fetcher.close()
+        else:
+            fetcher.clear_prefetched()
+            fetcher.base_dir = previous_base_dir
+
+def compile_document(html_content, parser=None, document_cache=None):
+    """
+    Parse HTML and compile its slide divs, using the document cache when possible
     
-    # Extract styles from the HTML
+    Args:
+        html_content (str): HTML content with slides
+        parser (str): BeautifulSoup tree builder (optional)
+        document_cache (DocumentCache): Cache of compiled slides (defaults to one in
+            DEFAULT_DOCUMENT_CACHE_DIR; False disables caching)
     
+    Returns:
+        list: Compiled slides (slide_ir.Slide)
+    """
+    parser = resolve_parser(parser)
+    if document_cache is None:
+        try:
+            document_cache = DocumentCache(version=compiler_version(get_color_from_class))
+        except OSError as e:
+            print(f"Warning: Document cache disabled: {e}")
+            document_cache = False
     
-    # Find all slide divs
-    slides = soup.find_all('div', class_='slide')
+    if document_cache:
+        slides = document_cache.load(html_content, parser)
+        if slides is not None:
+            print(f"Loaded {len(slides)} compiled slides from the document cache")
+            return slides
     
-    # Process each slide based on its content
-    for slide_index, slide_html in enumerate(slides):
-        # Check if this slide has column layout
-        left_column = slide_html.find('div', class_='left-column')
-        right_column = slide_html.find('div', class_='right-column')
-        use_columns_for_slide = bool(left_column or right_column)
-        
-        if use_columns_for_slide:
-            # Process as column layout
-            process_column_slide(slide_html, prs, slide_index, banner_url)
-        else:
-            # Process as standard layout
-            process_standard_slide(slide_html, prs, slide_index, banner_url)
+    soup = parse_html(html_content, parser)
+    
+    # Find all slide divs and compile them - layout never touches the soup
+    slides = compile_slides(soup.find_all('div', class_='slide'), get_color_from_class)
+    
+    # Free the parse tree before any images are downloaded
+    soup.decompose()
+    del soup
+    
+    if document_cache:
+        document_cache.store(html_content, parser, slides)
+    return slides
+
+def stream_slides(source, parser=None):
+    """
+    Compile slide divs one at a time as they are parsed
+    
+    Args:
+        source: HTML string, file object or iterable of chunks (see iter_slide_divs)
+        parser (str): BeautifulSoup tree builder (optional)
+    
+    Yields:
+        Slide: Each compiled slide, in document order
+    """
+    for slide_html in iter_slide_divs(source, parser):
+        yield compile_slide(slide_html, get_color_from_class)
+
+def collect_image_urls(slides, banner_url=None):
+    """
+    Collect the banner and every <img> source across the slides
+    
+    Args:
+        slides: Compiled slides (slide_ir.Slide)
+        banner_url (str): URL for the banner image (optional)
+    
+    Returns:
+        list: Unique image sources (URLs, data: URIs and file paths) in document order
+    """
+    urls = []
+    if banner_url and banner_url.strip():
+        urls.append(banner_url)
+    
+    for slide in slides:
+        for img_src in slide.image_srcs:
+            img_url = img_src.strip()
+            if img_url and img_url not in urls:
+                urls.append(img_url)
     
-    # Save the presentation
-    prs.save(output_filename)
-    print(f"Presentation saved as {output_filename}")
+    return urls
 
-def process_standard_slide(slide, prs, slide_index, banner_url=None):
+def process_standard_slide(slide, prs, slide_index, banner_url=None, fetcher=None):
     """Process a slide with standard layout and apply background color if specified"""
     # Use a blank slide to avoid placeholders
     slide_layout = prs.slide_layouts[6]  # Blank slide
     current_slide = prs.slides.add_slide(slide_layout)
     
     # First add the banner - MUST be first to ensure it's at the back
-    add_banner_to_slide(current_slide, banner_url, Inches(1.4))
+    add_banner_to_slide(current_slide, banner_url, Inches(1.4), fetcher)
     
     # Apply background color if the slide has a color class
     apply_slide_background_color(slide, current_slide)
     
     # Add title manually instead of using placeholder
-    title_element = slide.find('h1') or slide.find('h2')
-    
-    if title_element:
+    if slide.title is not None:
         title_shape = current_slide.shapes.add_textbox(
             Inches(0.5), Inches(0.5), Inches(9), Inches(1)
         )
         title_frame = title_shape.text_frame
         p = title_frame.add_paragraph()
-        p.text = title_element.text.strip()
+        p.text = slide.title
         p.font.size = Pt(32)
         p.font.bold = True
         p.alignment = PP_ALIGN.CENTER
     
     # Process the slide content - now passing prs and slide_index
-    process_standard_slide_content(slide, current_slide, prs, slide_index)
+    process_standard_slide_content(slide, current_slide, prs, slide_index, fetcher, banner_url)
     add_footer(current_slide)
     # Clean up any lingering placeholders
     clean_slide_placeholders(current_slide)
@@ -383,7 +628,7 @@ def process_text_content(element, text_frame, css_rules, slide=None, prs=None, s
                 p.font.italic = True
 
 
-def handle_text_overflow(text, text_frame, slide, current_slide_index, prs):
+def handle_text_overflow(text, text_frame, slide, current_slide_index, prs, banner_url=None, fetcher=None):
     """Break long text content across multiple slides with improved text wrapping"""
     # Use a more conservative character count to ensure text fits
     chars_per_slide = 600  # Even more conservative than before
@@ -393,6 +638,8 @@ def handle_text_overflow(text, text_frame, slide, current_slide_index, prs):
     
     current_chars = 0
     current_para_index = 0
+    # Whether any paragraphs had to go on continuation slides
+    continued = False
     
     # Add paragraphs until we hit the character limit
     while current_para_index < len(paragraphs):
@@ -409,7 +656,7 @@ def handle_text_overflow(text, text_frame, slide, current_slide_index, prs):
             next_slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank slide
             
             # First add the banner - MUST be first to ensure proper layering
-            add_banner_to_slide(slide, banner_url, Inches(1.5))
+            add_banner_to_slide(next_slide, banner_url, Inches(1.5), fetcher)
             
             # Add a title indicating continuation
             title_shape = next_slide.shapes.add_textbox(
@@ -433,12 +680,12 @@ def handle_text_overflow(text, text_frame, slide, current_slide_index, prs):
             next_text_frame.margin_top = 0
             next_text_frame.margin_bottom = 0
             
-            # Recursively handle remaining paragraphs
-            remaining_paras = paragraphs[current_para_index:]
-            remaining_text = '\n'.join(remaining_paras)
-            handle_text_overflow(remaining_text, next_text_frame, next_slide, 
-                               current_slide_index+1, prs)
-            return True
+            # Carry on with the remaining paragraphs on the new slide
+            text_frame = next_text_frame
+            current_slide_index += 1
+            current_chars = 0
+            continued = True
+            continue
         
         # If we get here, we can add this paragraph to the current slide
         p = text_frame.add_paragraph()
@@ -447,49 +694,62 @@ def handle_text_overflow(text, text_frame, slide, current_slide_index, prs):
         current_chars += len(para_text)
         current_para_index += 1
     
-    return False
+    return continued
 
-def process_standard_slide_content(slide_html, current_slide, prs=None, slide_index=0):
-    """Process content for a standard slide layout with better content fitting"""
-    # Track vertical position for adding content
-    current_y = Inches(1.5)  # Start after title
-    
+def process_standard_slide_content(slide, current_slide, prs=None, slide_index=0, fetcher=None, banner_url=None):
+    """
+    Process content for a standard slide layout with better content fitting
+
+    Rows that do not fit go on continuation slides. A cursor into the slide's
+    rows marks where each continuation picks up, so any number of them are
+    laid out in one pass without copying rows or recursing.
+    """
     # Calculate maximum content height
     max_y = Inches(SLIDE_HEIGHT_INCHES - 0.7 - FOOTER_HEIGHT_INCHES)
-
     
-    # Get overall text length to determine if we need overflow handling
-    full_text = slide_html.get_text().strip()
-    
-    # If the entire content is very long, handle it specially
-    if len(full_text) > 1000 and prs:  # Lower threshold for better content fit
-        content_shape = current_slide.shapes.add_textbox(
-            Inches(0.5), current_y, Inches(9), Inches(5)
-        )
-        content_frame = content_shape.text_frame
-        content_frame.word_wrap = True
-        content_frame.margin_left = 0
-        content_frame.margin_right = 0
-        content_frame.margin_top = 0
-        content_frame.margin_bottom = 0
-        
-        # Handle as overflow text
-        handle_text_overflow(full_text, content_frame, current_slide, slide_index, prs)
-        return
-    
-    # Find and process all row divs
-    rows = slide_html.find_all('div', class_='row')
-    
-    # If no rows are found, process the slide content directly
-    if not rows:
-        content_shape = current_slide.shapes.add_textbox(
-            Inches(0.5), current_y, Inches(9), Inches(5)
-        )
-        content_frame = content_shape.text_frame
-        process_content(slide_html, content_frame, current_slide, current_y, prs, slide_index)
-    else:
+    # All row divs of the slide
+    rows = slide.rows
+    # Title and text of the rows left for each continuation
+    remaining = RemainingRows(rows)
+    # Index of the first row not laid out yet
+    start = 0
+    title, text_length = slide.title, slide.text_length
+    
+    while True:
+        # Track vertical position for adding content
+        current_y = Inches(1.5)  # Start after title
+        # Where the next continuation slide picks up (None once every row is placed)
+        next_start = None
+        
+        # If the entire content is very long, handle it specially
+        if text_length > 1000 and prs:  # Lower threshold for better content fit
+            full_text = slide.text if start == 0 else remaining.text(start)
+            content_shape = current_slide.shapes.add_textbox(
+                Inches(0.5), current_y, Inches(9), Inches(5)
+            )
+            content_frame = content_shape.text_frame
+            content_frame.word_wrap = True
+            content_frame.margin_left = 0
+            content_frame.margin_right = 0
+            content_frame.margin_top = 0
+            content_frame.margin_bottom = 0
+            
+            # Handle as overflow text
+            handle_text_overflow(full_text, content_frame, current_slide, slide_index, prs, banner_url, fetcher)
+            return
+        
+        # If no rows are found, process the slide content directly
+        if not rows:
+            content_shape = current_slide.shapes.add_textbox(
+                Inches(0.5), current_y, Inches(9), Inches(5)
+            )
+            content_frame = content_shape.text_frame
+            process_content(slide.body, content_frame, current_slide, current_y, prs, slide_index, fetcher)
+            return
+        
         # Process each row with better spacing management
-        for i, row in enumerate(rows):
+        for i in range(start, len(rows)):
+            row = rows[i]
             # Check remaining space
             remaining_height = max_y - current_y
             if remaining_height < Inches(1.0) and i < len(rows) - 1:
@@ -498,10 +758,9 @@ def process_standard_slide_content(slide_html, current_slide, prs=None, slide_in
                 if prs:
                     next_slide = prs.slides.add_slide(prs.slide_layouts[6])
                     # First add the banner - MUST be first to ensure proper layering
-                    add_banner_to_slide(slide_html, banner_url, Inches(1.5))
+                    add_banner_to_slide(next_slide, banner_url, Inches(1.5), fetcher)
                     # Add a title indicating continuation
-                    title_element = slide_html.find('h1') or slide_html.find('h2')
-                    title_text = title_element.get_text().strip() if title_element else f"Slide {slide_index+1}"
+                    title_text = title if title is not None else f"Slide {slide_index+1}"
                     
                     title_shape = next_slide.shapes.add_textbox(
                         Inches(0.5), Inches(0.5), Inches(9), Inches(0.8)
@@ -515,23 +774,18 @@ def process_standard_slide_content(slide_html, current_slide, prs=None, slide_in
                     
                     # Process remaining rows on new slide
                     next_y = Inches(1.5)
-                    for next_row in rows[i:]:
+                    for continue_index in range(i, len(rows)):
+                        next_row = rows[continue_index]
                         # Calculate content height
                         row_height = estimate_row_height(next_row)
                         
                         # Check if it fits on the continuation slide
                         if next_y + row_height > Inches(SLIDE_HEIGHT_INCHES - 0.7):
                             # Still too much content, need another slide
-                            continue_index = rows.index(next_row)
                             if continue_index < len(rows) - 1:
-                                # Recursively handle remaining content
-                                remaining_rows_html = BeautifulSoup('<div></div>', 'html.parser').div
-                                for r in rows[continue_index:]:
-                                    remaining_rows_html.append(r.copy())
-                                
-                                process_standard_slide_content(
-                                    remaining_rows_html, next_slide, prs, slide_index+1
-                                )
+                                # The rest starts over at the top of this continuation slide,
+                                # as it always has, and moves on from there
+                                next_start = continue_index
                                 break
                         
                         # Create a text frame for this row
@@ -543,7 +797,7 @@ def process_standard_slide_content(slide_html, current_slide, prs=None, slide_in
                         
                         # Process the content of the row
                         new_y = process_content(next_row, text_frame, next_slide, 
-                                             next_y, prs, slide_index+1)
+                                             next_y, prs, slide_index+1, fetcher)
                         
                         # Update position for next row
                         next_y = max(next_y + row_height, new_y) + Inches(0.3) if new_y else next_y + row_height + Inches(0.3)
@@ -570,7 +824,7 @@ def process_standard_slide_content(slide_html, current_slide, prs=None, slide_in
             text_frame.margin_bottom = 0
             
             # Process the content of the row
-            new_y = process_content(row, text_frame, current_slide, current_y, prs, slide_index)
+            new_y = process_content(row, text_frame, current_slide, current_y, prs, slide_index, fetcher)
             
             # Update the vertical position for the next row
             current_y = max(current_y + row_height, new_y) + Inches(0.2) if new_y else current_y + row_height + Inches(0.2)
@@ -581,10 +835,9 @@ def process_standard_slide_content(slide_html, current_slide, prs=None, slide_in
                 if prs:
                     next_slide = prs.slides.add_slide(prs.slide_layouts[6])
                     # First add the banner - MUST be first to ensure proper layering
-                    add_banner_to_slide(slide_html, banner_url, Inches(1.5))
+                    add_banner_to_slide(next_slide, banner_url, Inches(1.5), fetcher)
                     # Add a title indicating continuation
-                    title_element = slide_html.find('h1') or slide_html.find('h2')
-                    title_text = title_element.get_text().strip() if title_element else f"Slide {slide_index+1}"
+                    title_text = title if title is not None else f"Slide {slide_index+1}"
                     
                     title_shape = next_slide.shapes.add_textbox(
                         Inches(0.5), Inches(0.5), Inches(9), Inches(0.8)
@@ -596,15 +849,18 @@ def process_standard_slide_content(slide_html, current_slide, prs=None, slide_in
                     p.font.bold = True
                     p.font.size = Pt(18)
                     
-                    # Recursively process remaining rows on new slide
-                    remaining_rows_html = BeautifulSoup('<div></div>', 'html.parser').div
-                    for r in rows[i+1:]:
-                        remaining_rows_html.append(r.copy())
-                    
-                    process_standard_slide_content(
-                        remaining_rows_html, next_slide, prs, slide_index+1
-                    )
+                    # Process remaining rows on new slide
+                    next_start = i + 1
                 break
+        
+        if next_start is None:
+            return
+        
+        # Move the cursor on to the continuation slide
+        start = next_start
+        current_slide = next_slide
+        slide_index += 1
+        title, text_length = remaining.title(start), remaining.text_length(start)
 
 
 # Two specific fixes for the HTML to PowerPoint converter:
@@ -612,42 +868,27 @@ def process_standard_slide_content(slide_html, current_slide, prs=None, slide_in
 # 2. Fix for the image in slide 2's right column to keep it inside the row box
 
 # FIX 1: Improved color handling from div tags
-def process_headers_with_color(element, text_frame):
+def process_headers_with_color(row, text_frame):
     """Process headers with improved color styling"""
-    for header in element.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
+    size_map = {'h1': 24, 'h2': 20, 'h3': 20, 'h4': 16, 'h5': 14, 'h6': 12}
+    for header in row.headers:
         p = text_frame.add_paragraph()
-        p.text = header.get_text().strip()
+        p.text = header.text
         p.font.bold = True
-        size_map = {'h1': 24, 'h2': 20, 'h3': 20, 'h4': 16, 'h5': 14, 'h6': 12}
-        p.font.size = Pt(size_map.get(header.name, 14))
-        
-        # Check color in this priority: header tag itself, parent div, grandparent div
-        header_color = get_color_from_class(header)
+        p.font.size = Pt(size_map.get(header.tag, 14))
         
-        # If no color found in the header itself, look at parent div
-        if header_color == RGBColor(255, 255, 255):
-            parent_div = header.find_parent('div')
-            if parent_div:
-                header_color = get_color_from_class(parent_div)
-                
-                # If still no color, try grandparent
-                if header_color == RGBColor(255, 255, 255):
-                    grandparent_div = parent_div.find_parent('div')
-                    if grandparent_div:
-                        header_color = get_color_from_class(grandparent_div)
-        
-        # Apply the color if one was found
-        if header_color != RGBColor(255, 255, 255):
-            p.font.color.rgb = header_color
+        # Color from the header tag itself, its parent div or grandparent div - resolved when compiled
+        if header.color is not None:
+            p.font.color.rgb = header.color
 
 
-def process_paragraphs_with_color(element, text_frame):
+def process_paragraphs_with_color(row, text_frame):
     """Process paragraphs with improved color styling"""
-    for para in element.find_all('p'):
+    for para in row.paragraphs:
         p = text_frame.add_paragraph()
         
         # Get the text and highlight numbers with regex
-        text = para.get_text().strip()
+        text = para.text
         
         # Find all numbers in the text
         num_positions = [(m.start(), m.end()) for m in re.finditer(r'\b\d+(\.\d+)?\b', text)]
@@ -681,37 +922,26 @@ def process_paragraphs_with_color(element, text_frame):
             p.font.size = Pt(12)
         
         # Apply color as before
-        para_color = get_color_from_class(para)
-        if para_color == RGBColor(255, 255, 255):
-            parent_div = para.find_parent('div')
-            if parent_div:
-                para_color = get_color_from_class(parent_div)
-                if para_color == RGBColor(255, 255, 255):
-                    grandparent_div = parent_div.find_parent('div')
-                    if grandparent_div:
-                        para_color = get_color_from_class(grandparent_div)
-        
-        if para_color != RGBColor(255, 255, 255):
-            p.font.color.rgb = para_color
+        if para.color is not None:
+            p.font.color.rgb = para.color
 
 # FIX 2: Keep images inside row boxes in column layouts
 # Targeted fix for image overlap in column content while keeping everything in the same box
 
 
-def process_column_slide(slide_html, prs, slide_idx,banner_url=None):
+def process_column_slide(slide_ir, prs, slide_idx,banner_url=None, fetcher=None):
     """Process a slide with column layout and apply background color if specified"""
     slide_layout = prs.slide_layouts[6]  # Blank slide
     slide = prs.slides.add_slide(slide_layout)
 
     # First add the banner - MUST be first to ensure it's at the back
-    add_banner_to_slide(slide, banner_url, Inches(1.4))
+    add_banner_to_slide(slide, banner_url, Inches(1.4), fetcher)
     
     # Apply background color if the slide has a color class
-    apply_slide_background_color(slide_html, slide)
+    apply_slide_background_color(slide_ir, slide)
 
     # Title
-    title_element = slide_html.find('h1') or slide_html.find('h2')
-    title_text = title_element.get_text().strip() if title_element else f"Slide {slide_idx + 1}"
+    title_text = slide_ir.title if slide_ir.title is not None else f"Slide {slide_idx + 1}"
 
     # Use standard slide dimensions
     slide_width_inches = SLIDE_WIDTH_INCHES
@@ -723,8 +953,8 @@ def process_column_slide(slide_html, prs, slide_idx,banner_url=None):
     title_frame.paragraphs[0].font.bold = True
 
     # Left and Right columns
-    left_column = slide_html.find('div', class_='left-column')
-    right_column = slide_html.find('div', class_='right-column')
+    left_column = slide_ir.left
+    right_column = slide_ir.right
 
     # Column layout setup
     # Calculate dynamic column widths
@@ -744,15 +974,15 @@ def process_column_slide(slide_html, prs, slide_idx,banner_url=None):
     # Process left column if it exists
     y_left = start_y
     if left_column:
-        print(f"Processing left column with {len(left_column.find_all('div', class_='row'))} rows")
-        y_left = process_column_content(left_column, slide, left_x, y_left, col_width, slide_idx, prs)
+        print(f"Processing left column with {len(left_column.rows)} rows")
+        y_left = process_column_content(left_column, slide, left_x, y_left, col_width, slide_idx, prs, fetcher, banner_url)
         final_y_positions.append(y_left)
 
     # Process right column if it exists
     y_right = start_y
     if right_column:
-        print(f"Processing right column with {len(right_column.find_all('div', class_='row'))} rows")
-        y_right = process_column_content(right_column, slide, right_x, y_right, col_width, slide_idx, prs)
+        print(f"Processing right column with {len(right_column.rows)} rows")
+        y_right = process_column_content(right_column, slide, right_x, y_right, col_width, slide_idx, prs, fetcher, banner_url)
         final_y_positions.append(y_right)
 
     # Determine the highest Y position after processing both columns
@@ -761,19 +991,8 @@ def process_column_slide(slide_html, prs, slide_idx,banner_url=None):
     else:
         highest_y = start_y + Inches(0.5)  # Default if no columns were processed
 
-    # IMPROVED: Find only rows that are direct children of the slide div or have the standalone class
-    standalone_rows = []
-    
-    # First look specifically for standalone class
-    for row in slide_html.find_all('div', class_='standalone'):
-        standalone_rows.append(row)
-        
-    # Check for rows that are direct children of the slide div - not in any column
-    for row in slide_html.find_all('div', class_='row', recursive=False):
-        if row not in standalone_rows:
-            # Double-check this row is not already in a column
-            if not (row.parent.get('class') and ('left-column' in row.parent.get('class') or 'right-column' in row.parent.get('class'))):
-                standalone_rows.append(row)
+    # Rows with the standalone class and rows that are direct children of the slide div
+    standalone_rows = slide_ir.standalone
     
     print(f"Found {len(standalone_rows)} standalone rows")
     
@@ -790,7 +1009,7 @@ def process_column_slide(slide_html, prs, slide_idx,banner_url=None):
             continuation_slide = prs.slides.add_slide(prs.slide_layouts[6])
             
             # First add the banner - MUST be first for proper layering
-            add_banner_to_slide(continuation_slide, banner_url,Inches(1.4))
+            add_banner_to_slide(continuation_slide, banner_url,Inches(1.4), fetcher)
             
             # Add continuation title
             cont_title_box = continuation_slide.shapes.add_textbox(
@@ -807,7 +1026,7 @@ def process_column_slide(slide_html, prs, slide_idx,banner_url=None):
             highest_y = Inches(1.5)  # Start below title
             
             # Apply background color to continuation slide if needed
-            apply_slide_background_color(slide_html, current_slide)
+            apply_slide_background_color(slide_ir, current_slide)
             
             # Clean up placeholders on the new slide
             clean_slide_placeholders(current_slide)
@@ -816,46 +1035,30 @@ def process_column_slide(slide_html, prs, slide_idx,banner_url=None):
         full_width = Inches(slide_width_inches - 1)
         
         # Process the row on the current slide
-        row_height = process_standalone_row(row, current_slide, margin, highest_y, full_width, slide_idx, prs)
+        row_height = process_standalone_row(row, current_slide, margin, highest_y, full_width, slide_idx, prs, fetcher)
         
         # Update the highest Y position for next row
         highest_y = row_height + Inches(0.2)  # Add spacing between rows
     add_footer(current_slide)
     # Clean up any lingering placeholders on the original slide
     clean_slide_placeholders(slide)
-def process_standalone_row(row, slide, left_x, y_pos, width, slide_index, prs):
+def process_standalone_row(row, slide, left_x, y_pos, width, slide_index, prs, fetcher=None):
     """Process rows that appear below columns, spanning the full width"""
     try:
-        print(f"Processing standalone row with content: {row.get_text().strip()[:50]}...")
+        print(f"Processing standalone row with content: {row.text.strip()[:50]}...")
         
         # Extract content from the row
-        img_tags = row.find_all('img')
+        img_tags = row.images
         has_images = len(img_tags) > 0
         
-        # Extract text content
-        header_text = ""
-        for header in row.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-            header_text += header.get_text().strip() + " "
-        
-        paragraph_text = ""
-        for para in row.find_all('p'):
-            paragraph_text += para.get_text().strip() + " "
-        
-        # Extract any other text
-        other_text = ""
-        row_copy = BeautifulSoup(str(row), 'html.parser')
-        for tag in row_copy.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'img']):
-            tag.decompose()
-        
-        for element in row_copy.descendants:
-            if isinstance(element, str) and element.strip():
-                other_text += element.strip() + " "
+        # Header, paragraph and any other text of the row
+        header_text, paragraph_text, other_text = row.header_text, row.paragraph_text, row.other_text
         
         combined_text = (header_text + " " + paragraph_text + " " + other_text).strip()
         has_text = bool(combined_text)
         
         # Get row background color
-        row_color = get_color_from_class(row)
+        row_color = row.color
         
         # Calculate box height based on content
         text_length = len(combined_text)
@@ -874,9 +1077,9 @@ def process_standalone_row(row, slide, left_x, y_pos, width, slide_index, prs):
         image_height = Inches(0)
         if has_images:
             img = img_tags[0]
-            if img.get('height'):
+            if img.height:
                 try:
-                    img_height = int(img.get('height'))
+                    img_height = int(img.height)
                     image_height = Inches(img_height / 96 + 0.4)
                 except (ValueError, TypeError):
                     image_height = Inches(1.5)  # Default if parsing fails
@@ -979,66 +1182,58 @@ def process_standalone_row(row, slide, left_x, y_pos, width, slide_index, prs):
             
             for img in img_tags:
                 try:
-                    img_url = img.get('src', '')
+                    img_url = img.src
                     
                     if img_url:
-                        response = requests.get(img_url, stream=True, timeout=15)  # Increased timeout
+                        fetcher = fetcher or get_default_fetcher()
+                        response = fetcher.fetch(img_url, timeout=15)  # Increased timeout
                         if response.status_code == 200:
-                            img_bytes = BytesIO(response.content)
+                            # One immutable buffer per image - BytesIO shares it instead of copying
+                            img_data = response.content
                             
                             try:
-                                # Get dimensions from image
-                                with PILImage.open(img_bytes) as pil_img:
-                                    aspect_ratio = pil_img.width / pil_img.height
-                                    
-                                    img_bytes.seek(0)  # Reset file pointer
-                                    
-                                    # Calculate image size
-                                    if img.get('width') and img.get('height'):
-                                        try:
-                                            width_px = int(img.get('width'))
-                                            height_px = int(img.get('height'))
-                                            img_width = Inches(width_px / 96)
-                                            img_height = Inches(height_px / 96)
-                                        except (ValueError, TypeError):
-                                            img_width = min(Inches(3.0), width - Inches(0.4))
-                                            img_height = img_width / aspect_ratio
-                                    else:
+                                # Get dimensions from the image header - no decode needed
+                                original_width, original_height = response.size or get_image_size(img_data)
+                                aspect_ratio = original_width / original_height
+                                
+                                # Calculate image size
+                                if img.width and img.height:
+                                    try:
+                                        width_px = int(img.width)
+                                        height_px = int(img.height)
+                                        img_width = Inches(width_px / 96)
+                                        img_height = Inches(height_px / 96)
+                                    except (ValueError, TypeError):
                                         img_width = min(Inches(3.0), width - Inches(0.4))
                                         img_height = img_width / aspect_ratio
-                                    
-                                    # Ensure image fits within width
-                                    if img_width > width - Inches(0.4):
-                                        img_width = width - Inches(0.4)
-                                        img_height = img_width / aspect_ratio
-                                    
-                                    # Center the image
-                                    img_x = left_x + (width - img_width) / 2
-                                    
-                                    # Make sure image doesn't exceed box height
-                                    if (img_y + img_height) > (y_pos + box_height - Inches(0.1)):
-                                        img_height = y_pos + box_height - img_y - Inches(0.1)
-                                        img_width = img_height * aspect_ratio
-                                    
-                                    # Create a fresh copy of the image data
-                                    img_data = BytesIO(img_bytes.getvalue())
-                                    
-                                    if img_height > Inches(0.2):  # Only add if reasonable size
-                                        picture = slide.shapes.add_picture(
-                                            img_data, 
-                                            img_x, 
-                                            img_y, 
-                                            width=img_width, 
-                                            height=img_height
-                                        )
-                                        print(f"Added image from {img_url}")
-                                    
-                                    # Close the copy
-                                    img_data.close()
+                                else:
+                                    img_width = min(Inches(3.0), width - Inches(0.4))
+                                    img_height = img_width / aspect_ratio
+                                
+                                # Ensure image fits within width
+                                if img_width > width - Inches(0.4):
+                                    img_width = width - Inches(0.4)
+                                    img_height = img_width / aspect_ratio
+                                
+                                # Center the image
+                                img_x = left_x + (width - img_width) / 2
+                                
+                                # Make sure image doesn't exceed box height
+                                if (img_y + img_height) > (y_pos + box_height - Inches(0.1)):
+                                    img_height = y_pos + box_height - img_y - Inches(0.1)
+                                    img_width = img_height * aspect_ratio
+                                
+                                if img_height > Inches(0.2):  # Only add if reasonable size
+                                    picture = slide.shapes.add_picture(
+                                        BytesIO(img_data), 
+                                        img_x, 
+                                        img_y, 
+                                        width=img_width, 
+                                        height=img_height
+                                    )
+                                    print(f"Added image from {img_url}")
                             except Exception as img_error:
                                 print(f"Error processing image: {img_error}")
-                            
-                            img_bytes.close()
                 except Exception as img_error:
                     print(f"Error with image: {img_error}")
         
@@ -1054,17 +1249,30 @@ def process_standalone_row(row, slide, left_x, y_pos, width, slide_index, prs):
 
 from pptx.enum.text import MSO_AUTO_SIZE
 
-def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, prs=None):
-    """Process content of a column with proper handling of rows and images"""
+def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, prs=None, fetcher=None, banner_url=None):
+    """
+    Process content of a column with proper handling of rows and images
+
+    Rows that do not fit carry on at the top of continuation slides, in the
+    same pass over the column's rows.
+
+    Returns:
+        Where the column ends on the slide it started on
+    """
     current_y = y_pos
+    # current_y on the original slide, once rows have moved on to continuations
+    first_slide_y = None
     
     try:
-        # Find all rows in this column
-        rows = column.find_all('div', class_='row')
+        # All rows in this column
+        rows = column.rows
+        # Titles of the rows left for each continuation
+        remaining = RemainingRows(rows)
+        title = column.title
         print(f"Processing column content with {len(rows)} rows")
         
         # Process each row in the column
-        for row in rows:
+        for row_index, row in enumerate(rows):
             try:
                 # Check remaining space on slide
                 #remaining_height = Inches(SLIDE_HEIGHT_INCHES - 1.0 - FOOTER_HEIGHT_INCHES) - current_y
@@ -1078,11 +1286,10 @@ def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, pr
                     next_slide = prs.slides.add_slide(slide_layout)
                     
                     # First add the banner - MUST be first to ensure proper layering
-                    add_banner_to_slide(next_slide, banner_url, Inches(1.4))
+                    add_banner_to_slide(next_slide, banner_url, Inches(1.4), fetcher)
                     
                     # Add continuation title
-                    title_element = column.parent.find('h1') or column.parent.find('h2')
-                    title_text = title_element.get_text().strip() if title_element else f"Slide {slide_index + 1}"
+                    title_text = title if title is not None else f"Slide {slide_index + 1}"
                     
                     title_box = next_slide.shapes.add_textbox(
                         Inches(0.5), Inches(0.3), Inches(SLIDE_WIDTH_INCHES - 1), Inches(0.8)
@@ -1093,45 +1300,28 @@ def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, pr
                     p.font.size = Pt(24)
                     p.font.bold = True
                     
-                    # Process remaining rows on new slide
-                    remaining_rows_index = rows.index(row)
-                    if remaining_rows_index >= 0:
-                        new_column = BeautifulSoup("<div></div>", "html.parser").div
-                        for r in rows[remaining_rows_index:]:
-                            new_column.append(r.copy())
-                        
-                        process_column_content(new_column, next_slide, x_pos, Inches(1.5), width, slide_index + 1, prs)
-                    break
+                    # Process remaining rows on new slide, starting with this one
+                    if first_slide_y is None:
+                        first_slide_y = current_y
+                    slide = next_slide
+                    current_y = Inches(1.5)
+                    slide_index += 1
+                    title = remaining.title(row_index)
+                    print(f"Processing column content with {len(rows) - row_index} rows")
                 
                 # Extract content from this row
-                img_tags = row.find_all('img')
+                img_tags = row.images
                 has_images = len(img_tags) > 0
                 
-                # Get text content
-                header_text = ""
-                for header in row.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-                    header_text += header.get_text().strip() + " "
-                
-                paragraph_text = ""
-                for para in row.find_all('p'):
-                    paragraph_text += para.get_text().strip() + " "
-                
-                # Get any other text
-                other_text = ""
-                row_copy = BeautifulSoup(str(row), 'html.parser')
-                for tag in row_copy.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'img']):
-                    tag.decompose()
-                
-                for element in row_copy.descendants:
-                    if isinstance(element, str) and element.strip():
-                        other_text += element.strip() + " "
+                # Header, paragraph and any other text of the row
+                header_text, paragraph_text, other_text = row.header_text, row.paragraph_text, row.other_text
                 
                 # Combine all text
                 combined_text = (header_text + " " + paragraph_text + " " + other_text).strip()
                 has_text = bool(combined_text)
                 
                 # Get background color
-                row_color = get_color_from_class(row)
+                row_color = row.color
                 
                 # Calculate space needed based on content
                 text_length = len(combined_text)
@@ -1151,9 +1341,9 @@ def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, pr
                 if has_images:
                     # IMPROVEMENT: Add more space for images
                     img = img_tags[0]
-                    if img.get('height'):
+                    if img.height:
                         try:
-                            img_height = int(img.get('height'))
+                            img_height = int(img.height)
                             # Increase the multiplier to allow more space
                             image_height = Inches((img_height / 96) * 1.5)
                         except (ValueError, TypeError):
@@ -1286,93 +1476,86 @@ def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, pr
                     
                     for img_index, img in enumerate(img_tags):
                         try:
-                            img_url = img.get('src', '')
+                            img_url = img.src
                             print(f"Processing image {img_index+1}: {img_url}")
                             
                             if img_url:
                                 # Increase timeout to help with connection issues
-                                response = requests.get(img_url, stream=True, timeout=15)
+                                fetcher = fetcher or get_default_fetcher()
+                                response = fetcher.fetch(img_url, timeout=15)
                                 if response.status_code == 200:
-                                    img_bytes = BytesIO(response.content)
+                                    # One immutable buffer per image - BytesIO shares it instead of copying
+                                    img_data = response.content
                                     
                                     try:
-                                        # Get dimensions from image
-                                        with PILImage.open(img_bytes) as pil_img:
-                                            original_width, original_height = pil_img.size
-                                            aspect_ratio = original_width / original_height
-                                            
-                                            img_bytes.seek(0)  # Reset file pointer
-                                            
-                                            # Calculate image size - IMPROVED SIZING LOGIC
-                                            img_width = None
-                                            img_height = None
-                                            
-                                            # If both width and height specified, use those as starting point
-                                            if img.get('width') and img.get('height'):
-                                                try:
-                                                    width_px = int(img.get('width'))
-                                                    height_px = int(img.get('height'))
-                                                    
-                                                    # Apply minimum sizes
-                                                    width_px = max(width_px, 50)  # Minimum 50px
-                                                    height_px = max(height_px, 50)  # Minimum 50px
-                                                    
-                                                    img_width = Inches(width_px / 96)
-                                                    img_height = Inches(height_px / 96)
-                                                except (ValueError, TypeError):
-                                                    # Fall back to calculated dimensions
-                                                    img_width = min(Inches(width / 2), Inches(2.5))
-                                                    img_height = img_width / aspect_ratio
-                                            else:
-                                                # No dimensions specified, calculate based on available space
-                                                # Use a smaller fraction of column width
-                                                img_width = min(width * 0.8, Inches(2.5))
-                                                img_height = img_width / aspect_ratio
-                                            
-                                            # Calculate remaining space within the shape
-                                            remaining_height = (current_y + box_height) - img_y - Inches(0.2)
-                                            
-                                            # Ensure image fits within available height
-                                            if img_height > remaining_height and remaining_height > Inches(0.3):
-                                                img_height = remaining_height
-                                                img_width = img_height * aspect_ratio
-                                            
-                                            # Ensure image fits within column width
-                                            max_width = width - Inches(0.4)
-                                            if img_width > max_width:
-                                                img_width = max_width
-                                                img_height = img_width / aspect_ratio
-                                            
-                                            # Center the image horizontally
-                                            img_x = x_pos + (width - img_width) / 2
-                                            
-                                            # Final check to ensure reasonable dimensions
-                                            if img_width < Inches(0.2) or img_height < Inches(0.2):
-                                                # Skip if image would be too small
-                                                print(f"Skipping too small image: {img_width} x {img_height}")
-                                                continue
-                                            
-                                            # Only add if we have valid dimensions
-                                            if img_width > 0 and img_height > 0:
-                                                # IMPROVED: Create a new copy of image data for safety
-                                                img_data = BytesIO(img_bytes.getvalue())
+                                        # Get dimensions from the image header - no decode needed
+                                        original_width, original_height = response.size or get_image_size(img_data)
+                                        aspect_ratio = original_width / original_height
+                                        
+                                        # Calculate image size - IMPROVED SIZING LOGIC
+                                        img_width = None
+                                        img_height = None
+                                        
+                                        # If both width and height specified, use those as starting point
+                                        if img.width and img.height:
+                                            try:
+                                                width_px = int(img.width)
+                                                height_px = int(img.height)
                                                 
-                                                picture = slide.shapes.add_picture(
-                                                    img_data, 
-                                                    img_x, 
-                                                    img_y, 
-                                                    width=img_width, 
-                                                    height=img_height
-                                                )
+                                                # Apply minimum sizes
+                                                width_px = max(width_px, 50)  # Minimum 50px
+                                                height_px = max(height_px, 50)  # Minimum 50px
                                                 
-                                                img_data.close()  # Close the copy after use
-                                                print(f"Added image in column from {img_url} at position: {img_x}, {img_y}, size: {img_width} x {img_height}")
-                                            else:
-                                                print(f"Invalid image dimensions calculated: {img_width} x {img_height}")
+                                                img_width = Inches(width_px / 96)
+                                                img_height = Inches(height_px / 96)
+                                            except (ValueError, TypeError):
+                                                # Fall back to calculated dimensions
+                                                img_width = min(Inches(width / 2), Inches(2.5))
+                                                img_height = img_width / aspect_ratio
+                                        else:
+                                            # No dimensions specified, calculate based on available space
+                                            # Use a smaller fraction of column width
+                                            img_width = min(width * 0.8, Inches(2.5))
+                                            img_height = img_width / aspect_ratio
+                                        
+                                        # Calculate remaining space within the shape
+                                        remaining_height = (current_y + box_height) - img_y - Inches(0.2)
+                                        
+                                        # Ensure image fits within available height
+                                        if img_height > remaining_height and remaining_height > Inches(0.3):
+                                            img_height = remaining_height
+                                            img_width = img_height * aspect_ratio
+                                        
+                                        # Ensure image fits within column width
+                                        max_width = width - Inches(0.4)
+                                        if img_width > max_width:
+                                            img_width = max_width
+                                            img_height = img_width / aspect_ratio
+                                        
+                                        # Center the image horizontally
+                                        img_x = x_pos + (width - img_width) / 2
+                                        
+                                        # Final check to ensure reasonable dimensions
+                                        if img_width < Inches(0.2) or img_height < Inches(0.2):
+                                            # Skip if image would be too small
+                                            print(f"Skipping too small image: {img_width} x {img_height}")
+                                            continue
+                                        
+                                        # Only add if we have valid dimensions
+                                        if img_width > 0 and img_height > 0:
+                                            picture = slide.shapes.add_picture(
+                                                BytesIO(img_data), 
+                                                img_x, 
+                                                img_y, 
+                                                width=img_width, 
+                                                height=img_height
+                                            )
+                                            
+                                            print(f"Added image in column from {img_url} at position: {img_x}, {img_y}, size: {img_width} x {img_height}")
+                                        else:
+                                            print(f"Invalid image dimensions calculated: {img_width} x {img_height}")
                                     except Exception as img_error:
                                         print(f"Error processing column image: {img_error}")
-                                    
-                                    img_bytes.close()
                                 else:
                                     print(f"Image download failed with status code: {response.status_code}")
                         except Exception as img_error:
@@ -1388,7 +1571,7 @@ def process_column_content(column, slide, x_pos, y_pos, width, slide_index=0, pr
     except Exception as column_error:
         print(f"Error processing column: {column_error}")
     
-    return current_y
+    return current_y if first_slide_y is None else first_slide_y
 
 
 # Helper function to calculate appropriate box height
@@ -1444,9 +1627,8 @@ def estimate_row_height(row):
     # Base height for any row
     height = Inches(0.5)
     
-    # Get text content
-    text_content = row.get_text().strip()
-    text_length = len(text_content)
+    # Get text content length
+    text_length = row.text_length
     
     # Calculate height based on text length with more realistic estimates
     # Assuming approximately 40 characters per line and 0.2 inches per line
@@ -1456,12 +1638,12 @@ def estimate_row_height(row):
         height = max(height, text_height)
     
     # Add height for images
-    img = row.find('img')
-    if img:
+    if row.images:
+        img = row.images[0]
         # If height attribute exists, use it
-        if img.get('height'):
+        if img.height:
             try:
-                img_height = int(img.get('height')) / 96  # Convert px to inches
+                img_height = int(img.height) / 96  # Convert px to inches
                 height = max(height, Inches(img_height + 0.4))  # Add margin
             except (ValueError, TypeError):
                 height = max(height, Inches(2.0))  # Default if can't parse
@@ -1470,20 +1652,18 @@ def estimate_row_height(row):
             height = max(height, Inches(2.0))
     
     # Add height for tables
-    if row.find('table'):
-        rows = len(row.find_all('tr'))
+    if row.table_rows is not None:
+        rows = row.table_rows
         height = max(height, Inches(0.3 * rows + 0.3))  # 0.3 inches per row plus header
     
     # Add height for code blocks
-    code_block = row.find('div', class_='code-block') or row.find('pre')
-    if code_block:
-        code_text = code_block.get_text().strip()
-        code_lines = len(code_text.split('\n'))
+    if row.code_lines is not None:
+        code_lines = row.code_lines
         height = max(height, Inches(0.2 * code_lines + 0.3))  # 0.2 inches per line
     
     # Handle special elements
-    if row.find('ul') or row.find('ol'):
-        list_items = len(row.find_all('li'))
+    if row.list_items is not None:
+        list_items = row.list_items
         height = max(height, Inches(0.25 * list_items + 0.3))  # 0.25 inches per list item
     
     # Add extra padding to prevent content being cut off
@@ -1514,43 +1694,43 @@ def add_textbox_relative(slide, top, left, width, height, text, font_size=14, bg
 
 
 
-def process_content(element, text_frame, slide, y_position=None, prs=None, slide_index=0):
+def process_content(row, text_frame, slide, y_position=None, prs=None, slide_index=0, fetcher=None):
     max_y = y_position if y_position is not None else Inches(1.5)
     
-    process_headers_with_color(element, text_frame)
-    process_paragraphs_with_color(element, text_frame)
+    process_headers_with_color(row, text_frame)
+    process_paragraphs_with_color(row, text_frame)
     
     text_height = Inches(0.3) * len(text_frame.paragraphs)
     
-    if element.find('table'):
-        process_table(element.find('table'), text_frame)
-    elif element.find('ul') or element.find('ol'):
-        process_list(element, text_frame)
-    elif element.find(['pre', 'code']) or element.find('div', class_='code-block'):
-        process_code_block(element, text_frame)
+    if row.table:
+        process_table(row.table, text_frame)
+    elif row.list:
+        process_list(row.list, text_frame)
+    elif row.code:
+        process_code_block(row.code, text_frame)
     
-    img = element.find('img')
-    if img:
+    if row.images:
+        img = row.images[0]
         img_top = max_y + text_height + Inches(0.2)
         
-        img_url = img.get('src', '')
-        img_alt = img.get('alt', 'Image')
+        img_url = img.src
+        img_alt = img.alt
         
         try:
-            response = requests.get(img_url, stream=True, timeout=10)
+            fetcher = fetcher or get_default_fetcher()
+            response = fetcher.fetch(img_url, timeout=10)
             
             if response.status_code == 200:
-                img_bytes = BytesIO(response.content)
+                # One immutable buffer per image - BytesIO shares it instead of copying
+                img_data = response.content
                 
                 try:
-                    with PILImage.open(img_bytes) as pil_img:
-                        img_width, img_height = pil_img.size
-                        aspect_ratio = img_width / img_height
-                    
-                    img_bytes.seek(0)
+                    # Dimensions from the image header - no decode needed
+                    img_width, img_height = response.size or get_image_size(img_data)
+                    aspect_ratio = img_width / img_height
                     
-                    width_specified = img.get('width')
-                    height_specified = img.get('height')
+                    width_specified = img.width
+                    height_specified = img.height
                     
                     img_width = Inches(2.0)
                     img_height = img_width / aspect_ratio
@@ -1573,7 +1753,7 @@ def process_content(element, text_frame, slide, y_position=None, prs=None, slide
                         img_height = img_width / aspect_ratio
                     
                     picture = slide.shapes.add_picture(
-                        img_bytes, 
+                        BytesIO(img_data), 
                         left_position, 
                         img_top, 
                         width=img_width, 
@@ -1590,6 +1770,10 @@ def process_content(element, text_frame, slide, y_position=None, prs=None, slide
                 p = text_frame.add_paragraph()
                 p.text = f"[Image not available: {img_alt}]"
                 
+        except DeadlineExceededError:
+            # Out of time for this deck - keep the alt text and move on
+            p = text_frame.add_paragraph()
+            p.text = f"[Image: {img_alt}]"
         except Exception as request_error:
             print(f"Error downloading image: {request_error}")
             p = text_frame.add_paragraph()
@@ -1600,30 +1784,22 @@ def process_content(element, text_frame, slide, y_position=None, prs=None, slide
 
 
 
-def process_list(element, text_frame):
+def process_list(list_block, text_frame):
     """Process HTML lists and add them to the text frame"""
     # First add any text before the list
-    text_before = ''
-    list_elem = element.find(['ul', 'ol'])
-    
-    for sibling in list_elem.previous_siblings:
-        if isinstance(sibling, str) and sibling.strip():
-            text_before += sibling.strip() + ' '
-        elif hasattr(sibling, 'get_text'):
-            text_before += sibling.get_text().strip() + ' '
+    text_before = list_block.text_before
             
     if text_before.strip():
         p = text_frame.add_paragraph()
         p.text = text_before.strip()
     
     # Process list items
-    is_ordered = list_elem.name == 'ol'
-    list_items = list_elem.find_all('li')
+    is_ordered = list_block.ordered
     
-    for i, item in enumerate(list_items):
+    for i, item in enumerate(list_block.items):
         p = text_frame.add_paragraph()
         prefix = f"{i+1}. " if is_ordered else "• "
-        p.text = prefix + item.get_text().strip()
+        p.text = prefix + item
         p.level = 1  # Set indentation level
         
         
@@ -1636,7 +1812,7 @@ def process_table(table, text_frame):
     p.font.bold = True
     
     # Process headers
-    headers = [th.get_text().strip() for th in table.find_all('th')]
+    headers = table.headers
     if headers:
         p = text_frame.add_paragraph()
         p.text = " | ".join(headers)
@@ -1646,36 +1822,27 @@ def process_table(table, text_frame):
         p = text_frame.add_paragraph()
         p.text = "-" * (sum(len(h) for h in headers) + 3 * (len(headers) - 1))
     
-    # Process rows
-    for row in table.find_all('tr'):
-        cells = [td.get_text().strip() for td in row.find_all('td')]
-        if cells:
-            p = text_frame.add_paragraph()
-            p.text = " | ".join(cells)
+    # Process rows - only those with <td> cells were kept
+    for cells in table.rows:
+        p = text_frame.add_paragraph()
+        p.text = " | ".join(cells)
 
-def process_code_block(element, text_frame):
+def process_code_block(code_block, text_frame):
     """Process code blocks and add them to the text frame"""
-    # Find the code block element
-    code_elem = element.find(['pre', 'code']) or element.find('div', class_='code-block')
-    
-    if not code_elem:
-        return
-        
     # Add a label
     p = text_frame.add_paragraph()
     p.text = "[Code]"
     p.font.bold = True
     
     # Process code lines
-    code_text = code_elem.get_text().strip()
-    lines = code_text.split('\n')
+    lines = code_block.text.split('\n')
     
     for line in lines:
         p = text_frame.add_paragraph()
         p.text = line
         p.font.name = "Courier New"
         p.font.size = Pt(9)
-def process_image_with_download(element, text_frame, slide, css_rules, y_position=None):
+def process_image_with_download(element, text_frame, slide, css_rules, y_position=None, fetcher=None):
     """Process images with improved error handling to prevent file corruption"""
     img = element.find('img')
     if not img:
@@ -1704,7 +1871,8 @@ def process_image_with_download(element, text_frame, slide, css_rules, y_positio
     
     try:
         # Download the image with timeout
-        response = requests.get(img_url, stream=True, timeout=10)
+        fetcher = fetcher or get_default_fetcher()
+        response = fetcher.fetch(img_url, timeout=10)
         
         if response.status_code != 200:
             # Failed to download image
@@ -1713,25 +1881,21 @@ def process_image_with_download(element, text_frame, slide, css_rules, y_positio
             p.alignment = PP_ALIGN.CENTER
             return y_position + Inches(0.5)
         
-        # Create image from content
-        img_bytes = BytesIO(response.content)
+        # One immutable buffer per image - BytesIO shares it instead of copying
+        img_data = response.content
         
         try:
-            # Try to open the image to validate it
-            with PILImage.open(img_bytes) as pil_img:
-                img_width, img_height = pil_img.size
-                
-                # Skip extremely small or zero-dimension images
-                if img_width < 10 or img_height < 10:
-                    p = text_frame.add_paragraph()
-                    p.text = f"[Image: {img_alt} - invalid dimensions]"
-                    p.alignment = PP_ALIGN.CENTER
-                    return y_position + Inches(0.5)
-                
-                aspect_ratio = img_width / img_height
+            # Read the dimensions from the image header to validate it
+            img_width, img_height = response.size or get_image_size(img_data)
+            
+            # Skip extremely small or zero-dimension images
+            if img_width < 10 or img_height < 10:
+                p = text_frame.add_paragraph()
+                p.text = f"[Image: {img_alt} - invalid dimensions]"
+                p.alignment = PP_ALIGN.CENTER
+                return y_position + Inches(0.5)
             
-            # Reset file pointer
-            img_bytes.seek(0)
+            aspect_ratio = img_width / img_height
             
             # Get dimensions from HTML
             width_specified = img.get('width')
@@ -1772,16 +1936,9 @@ def process_image_with_download(element, text_frame, slide, css_rules, y_positio
             width = max(width, Inches(0.1))
             height = max(height, Inches(0.1))
             
-            # Create a new BytesIO object to ensure memory is properly managed
-            img_data = BytesIO(img_bytes.getvalue())
-            img_bytes.close()  # Close the original BytesIO object
-            
             # Add image to slide with explicit error handling
             try:
-                picture = slide.shapes.add_picture(img_data, left, top, width=width, height=height)
-                
-                # Close the BytesIO object after adding the picture
-                img_data.close()
+                picture = slide.shapes.add_picture(BytesIO(img_data), left, top, width=width, height=height)
                 
                 # Update position for next element
                 new_top = top + height + Inches(0.1)
@@ -1829,6 +1986,12 @@ def process_image_with_download(element, text_frame, slide, css_rules, y_positio
             p.alignment = PP_ALIGN.CENTER
             return y_position + Inches(0.5)
             
+    except DeadlineExceededError:
+        # Out of time for this deck - keep the alt text and move on
+        p = text_frame.add_paragraph()
+        p.text = f"[Image: {img_alt}]"
+        p.alignment = PP_ALIGN.CENTER
+        return y_position + Inches(0.5)
     except Exception as request_error:
         print(f"Error downloading image {img_url}: {request_error}")
         # Failed request
@@ -1874,11 +2037,11 @@ def create_html_file_from_string(html_content, filename="temp_html.html"):
     with open(filename, 'w', encoding='utf-8') as f:
         f.write(html_content)
     return filename
-def apply_slide_background_color(slide_html, current_slide):
+def apply_slide_background_color(slide, current_slide):
     """Apply background color to the entire slide based on color classes"""
     try:
-        # Get the background color from the slide's class
-        bg_color = get_color_from_class(slide_html)
+        # Background color from the slide's class, resolved when the slide was compiled
+        bg_color = slide.color
         
         # Get the RGB values - RGBColor objects store RGB values directly in rgb attribute
         default_color = RGBColor(255, 255, 255)
@@ -1960,20 +2123,23 @@ def add_footer(slide, footer_text="@surveys"):
     p.font.color.rgb = RGBColor(255, 255, 255)  # White
     p.alignment = PP_ALIGN.RIGHT
 
-def html_from_file_to_pptx(html_file, output_file="presentation.pptx"):
+def html_from_file_to_pptx(html_file, output_file="presentation.pptx", stream=False):
     """
     Process HTML file and convert to PowerPoint
     
     Args:
         html_file (str): Path to HTML file
         output_file (str): Path to save PowerPoint file
+        stream (bool): Read and convert the file one slide at a time (see html_to_pptx)
     """
     try:
         with open(html_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+            # A streamed file is read while the slides are rendered
+            html_content = f if stream else f.read()
             
-        # Convert HTML to PowerPoint
-        html_to_pptx(html_content, output_file)
+            # Convert HTML to PowerPoint, resolving relative image paths next to the HTML file
+            html_to_pptx(html_content, output_file, base_dir=os.path.dirname(os.path.abspath(html_file)),
+                         stream=stream)
         print(f"Successfully converted {html_file} to {output_file}")
         
     except FileNotFoundError:
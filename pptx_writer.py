@@ -0,0 +1,63 @@
+import posixpath
+import zipfile
+from pptx.opc.serialized import PackageWriter, _ZipPkgWriter
+
+# zlib's own default - what prs.save() uses for every part
+DEFAULT_XML_COMPRESSLEVEL = 6
+# Media that is already compressed; deflating it again costs CPU and saves nothing
+PRECOMPRESSED_MEDIA_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.jpe', '.gif', '.webp',
+    '.mp3', '.m4a', '.mp4', '.m4v', '.mov', '.wma', '.wmv',
+}
+
+
+def is_precompressed_media(membername):
+    """Check whether a zip member is an already-compressed file under ppt/media/"""
+    if not membername.startswith('ppt/media/'):
+        return False
+    return posixpath.splitext(membername)[1].lower() in PRECOMPRESSED_MEDIA_EXTENSIONS
+
+
+class _MediaStoredZipWriter(_ZipPkgWriter):
+    """Zip writer that stores compressed media as-is and deflates XML at a chosen level"""
+
+    def __init__(self, pkg_file, compresslevel):
+        super().__init__(pkg_file)
+        self._compresslevel = compresslevel
+
+    def write(self, pack_uri, blob):
+        membername = pack_uri.membername
+        if is_precompressed_media(membername):
+            self._zipf.writestr(membername, blob, compress_type=zipfile.ZIP_STORED)
+        else:
+            self._zipf.writestr(membername, blob, compress_type=zipfile.ZIP_DEFLATED,
+                                compresslevel=self._compresslevel)
+
+
+class _TunedPackageWriter(PackageWriter):
+    def __init__(self, pkg_file, pkg_rels, parts, compresslevel):
+        super().__init__(pkg_file, pkg_rels, parts)
+        self._compresslevel = compresslevel
+
+    def _write(self):
+        with _MediaStoredZipWriter(self._pkg_file, self._compresslevel) as phys_writer:
+            self._write_content_types_stream(phys_writer)
+            self._write_pkg_rels(phys_writer)
+            self._write_parts(phys_writer)
+
+
+def save_presentation(prs, file, compresslevel=DEFAULT_XML_COMPRESSLEVEL):
+    """
+    Save a presentation like prs.save(), without re-deflating compressed media
+
+    PNG, JPEG and other already-compressed files under ppt/media/ are written
+    with ZIP_STORED. XML parts and uncompressed media are deflated at the given
+    level: 1 for the fastest save, 9 for the smallest file.
+
+    Args:
+        prs: The Presentation object
+        file: Path or writable file-like object
+        compresslevel (int): zlib level (0-9) for XML parts
+    """
+    package = prs.part.package
+    _TunedPackageWriter(file, package._rels, tuple(package.iter_parts()), compresslevel)._write()
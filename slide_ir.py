@@ -0,0 +1,454 @@
+from pptx.dml.color import RGBColor
+from dom_index import DomIndex, HEADING_TAGS, TextCache, collect_row_text, join_text_metrics
+
+# Bump whenever the compiled structure or what is compiled into it changes -
+# it is part of the stamp that invalidates cached documents
+IR_VERSION = 1
+# get_color_from_class's default - an element without a color class
+WHITE = (255, 255, 255)
+
+
+class ImageRef:
+    """An <img> tag: its src, alt text (defaulting to 'Image') and width/height attributes as written"""
+    __slots__ = ('src', 'alt', 'width', 'height')
+
+    def __init__(self, src='', alt='Image', width=None, height=None):
+        self.src = src
+        self.alt = alt
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def from_tag(cls, img):
+        return cls(img.get('src', ''), img.get('alt', 'Image'), img.get('width'), img.get('height'))
+
+
+class TextBlock:
+    """Stripped text of a heading, paragraph or code block, with the color it is drawn in (None for the default)"""
+    __slots__ = ('tag', 'text', 'color')
+
+    def __init__(self, tag, text, color=None):
+        self.tag = tag
+        self.text = text
+        self.color = color
+
+
+class ListBlock:
+    """A <ul>/<ol>: the text preceding it in its parent and the stripped text of each item"""
+    __slots__ = ('ordered', 'text_before', 'items')
+
+    def __init__(self, ordered, text_before, items):
+        self.ordered = ordered
+        self.text_before = text_before
+        self.items = items
+
+
+class TableBlock:
+    """A <table>: its <th> texts and, for every <tr> that has <td> cells, their texts"""
+    __slots__ = ('headers', 'rows')
+
+    def __init__(self, headers, rows):
+        self.headers = headers
+        self.rows = rows
+
+
+class Row:
+    """
+    Everything layout needs from one div.row (or from a slide without rows)
+
+    Rows of standard slides carry their blocks - headings, paragraphs and the
+    first table, list, code block - plus the counts estimate_row_height works
+    from. Rows of column slides carry the header/paragraph/other text split
+    and the background color their boxes are filled with. Both keep the raw
+    text, the images and the div.row elements nested inside them (rows),
+    in document order.
+    """
+    __slots__ = ('text', 'text_length', 'color', 'images', 'rows',
+                 'headers', 'paragraphs', 'table', 'list', 'code',
+                 'table_rows', 'list_items', 'code_lines',
+                 'header_text', 'paragraph_text', 'other_text')
+
+    def __init__(self, text='', text_length=0, color=None, images=(), rows=()):
+        self.text = text
+        self.text_length = text_length
+        self.color = color
+        self.images = images
+        self.rows = rows
+        self.headers = ()
+        self.paragraphs = ()
+        self.table = None
+        self.list = None
+        self.code = None
+        # Counts used by estimate_row_height (None when the row has no table/list/code block)
+        self.table_rows = None
+        self.list_items = None
+        self.code_lines = None
+        self.header_text = self.paragraph_text = self.other_text = ''
+
+
+class Column:
+    """
+    A left or right column: its rows (nested ones included) and the first
+    h1 (or else h2) of the element holding it, which continuation slides repeat
+    """
+    __slots__ = ('title', 'rows')
+
+    def __init__(self, title, rows):
+        self.title = title
+        self.rows = rows
+
+
+class Slide:
+    """
+    One slide div, compiled
+
+    Standard slides have rows (or, without any div.row, a body row built from
+    the whole slide) and their stripped text for the overflow check. Column
+    slides have left/right columns and the standalone rows below them.
+    """
+    __slots__ = ('title', 'color', 'text', 'text_length', 'image_srcs',
+                 'rows', 'body', 'left', 'right', 'standalone')
+
+    def __init__(self, title=None, color=None, text='', image_srcs=(), rows=(), body=None,
+                 left=None, right=None, standalone=()):
+        self.title = title
+        self.color = color
+        self.text = text
+        self.text_length = len(text)
+        self.image_srcs = image_srcs
+        self.rows = rows
+        self.body = body
+        self.left = left
+        self.right = right
+        self.standalone = standalone
+
+    @property
+    def has_columns(self):
+        return self.left is not None or self.right is not None
+
+
+class RemainingRows:
+    """
+    Title and text of every tail rows[start:] of a list of rows
+
+    Continuation slides are titled with the first h1 (or else h2) of the rows
+    they carry on with, and a standard continuation whose text is too long is
+    laid out as overflow text. Both are precomputed for every start position
+    in one backwards pass, so paginating a slide takes linear time however many
+    continuation slides it needs.
+
+    Args:
+        rows: Rows of a slide or column, in order
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        count = len(rows)
+        self._h1 = [None] * (count + 1)
+        self._h2 = [None] * (count + 1)
+        # (length, leading whitespace, trailing whitespace) of the joined raw texts
+        self._text = [(0, 0, 0)] * (count + 1)
+        for start in range(count - 1, -1, -1):
+            row = rows[start]
+            self._h1[start] = self._first_header(row, 'h1', self._h1[start + 1])
+            self._h2[start] = self._first_header(row, 'h2', self._h2[start + 1])
+            text = self._row_text(row)
+            self._text[start] = join_text_metrics((
+                (len(text), len(text) - len(text.lstrip()), len(text) - len(text.rstrip())),
+                self._text[start + 1],
+            ))
+
+    # Subclasses override these two to work on other kinds of rows
+    @staticmethod
+    def _row_text(row):
+        return row.text
+
+    @staticmethod
+    def _first_header(row, tag, default=None):
+        return _first_header(row, tag, default)
+
+    def title(self, start):
+        """Text of the first h1 in rows[start:], else of the first h2 (None if there is neither)"""
+        return self._h1[start] if self._h1[start] is not None else self._h2[start]
+
+    def text_length(self, start):
+        """len("".join(row.text for row in rows[start:]).strip()) without joining"""
+        length, leading, trailing = self._text[start]
+        if leading == length:
+            return 0
+        return length - leading - trailing
+
+    def text(self, start):
+        """The stripped, joined text of rows[start:]"""
+        return "".join(self._row_text(row) for row in self.rows[start:]).strip()
+
+
+def _first_header(row, tag, default=None):
+    for header in row.headers:
+        if header.tag == tag:
+            return header.text
+    return default
+
+
+def compile_slides(slides, color_of, text_cache=None):
+    """
+    Compile slide divs into Slide objects that no longer reference the soup
+
+    Args:
+        slides: Slide div elements
+        color_of: Function mapping an element to its color (get_color_from_class)
+        text_cache (TextCache): Conversion-wide text memo (optional)
+
+    Returns:
+        list: One Slide per div, in order
+    """
+    text_cache = text_cache or TextCache()
+    return [compile_slide(slide_html, color_of, text_cache) for slide_html in slides]
+
+
+def compile_slide(slide_html, color_of, text_cache=None):
+    """
+    Compile one slide div - see compile_slides
+
+    Returns:
+        Slide: The compiled slide
+    """
+    index = DomIndex(slide_html, text_cache)
+
+    title_element = index.find(slide_html, 'h1') or index.find(slide_html, 'h2')
+    slide = Slide(
+        title=index.text(title_element) if title_element else None,
+        color=color_of(slide_html),
+        image_srcs=tuple(img.get('src', '') for img in index.images(slide_html)),
+    )
+
+    left_column = index.find(slide_html, 'div.left-column')
+    right_column = index.find(slide_html, 'div.right-column')
+    if left_column or right_column:
+        slide.left = _compile_column(left_column, index, color_of) if left_column else None
+        slide.right = _compile_column(right_column, index, color_of) if right_column else None
+        slide.standalone = tuple(_compile_row_texts(row, index, color_of)
+                                 for row in _standalone_rows(slide_html, index))
+        return slide
+
+    slide.text = index.text(slide_html)
+    slide.text_length = len(slide.text)
+    rows = index.find_all(slide_html, 'div.row')
+    if rows:
+        slide.rows = _compile_nested(rows, index, lambda row: _compile_content(row, index, color_of))
+    else:
+        slide.body = _compile_content(slide_html, index, color_of)
+    return slide
+
+
+def _compile_nested(rows, index, compile_row):
+    """Compile rows in document order and link each one to the compiled rows nested inside it"""
+    compiled = {id(row): compile_row(row) for row in rows}
+    for row in rows:
+        if index.count(row, 'div.row'):
+            compiled[id(row)].rows = tuple(compiled[id(nested)] for nested in index.find_all(row, 'div.row'))
+    return [compiled[id(row)] for row in rows]
+
+
+def _compile_column(column, index, color_of):
+    parent = column.parent
+    title_element = index.find(parent, 'h1') or index.find(parent, 'h2')
+    rows = index.find_all(column, 'div.row')
+    return Column(
+        index.text(title_element) if title_element else None,
+        _compile_nested(rows, index, lambda row: _compile_row_texts(row, index, color_of)),
+    )
+
+
+def _standalone_rows(slide_html, index):
+    """div.standalone elements, then div.row children of the slide that are outside any column"""
+    standalone_rows = index.find_all(slide_html, 'div.standalone')
+    seen = {id(row) for row in standalone_rows}
+    parent_classes = slide_html.get('class') or ()
+    in_column = 'left-column' in parent_classes or 'right-column' in parent_classes
+    for row in slide_html.find_all('div', class_='row', recursive=False):
+        if id(row) not in seen and not in_column:
+            standalone_rows.append(row)
+    return standalone_rows
+
+
+def _compile_row_texts(row, index, color_of):
+    """Row of a column slide: text split, background color and images"""
+    compiled = Row(
+        text=row.get_text(),
+        text_length=index.text_length(row),
+        color=color_of(row),
+        images=tuple(ImageRef.from_tag(img) for img in index.images(row)),
+    )
+    # Only continuation titles need them - no colors
+    compiled.headers = tuple(TextBlock(header.name, index.text(header))
+                             for header in index.find_all(row, *HEADING_TAGS))
+    compiled.header_text, compiled.paragraph_text, compiled.other_text = collect_row_text(row)
+    return compiled
+
+
+def _compile_content(element, index, color_of):
+    """Row of a standard slide: its blocks and the counts its height is estimated from"""
+    compiled = Row(
+        text=element.get_text(),
+        text_length=index.text_length(element),
+        images=tuple(ImageRef.from_tag(img) for img in index.images(element)),
+    )
+    compiled.headers = tuple(
+        TextBlock(header.name, index.text(header), _inherited_color(header, color_of))
+        for header in index.find_all(element, *HEADING_TAGS)
+    )
+    compiled.paragraphs = tuple(
+        TextBlock('p', index.text(para), _inherited_color(para, color_of))
+        for para in index.find_all(element, 'p')
+    )
+
+    table = index.find(element, 'table')
+    if table:
+        compiled.table = _compile_table(table)
+        compiled.table_rows = index.count(element, 'tr')
+
+    list_elem = index.find(element, 'ul', 'ol')
+    if list_elem:
+        compiled.list = _compile_list(list_elem, index)
+        compiled.list_items = index.count(element, 'li')
+
+    code_elem = index.find(element, 'pre', 'code') or index.find(element, 'div.code-block')
+    if code_elem:
+        compiled.code = TextBlock(code_elem.name, index.text(code_elem))
+
+    # estimate_row_height prefers div.code-block, process_code_block <pre>/<code>
+    estimated_code = index.find(element, 'div.code-block') or index.find(element, 'pre')
+    if estimated_code:
+        compiled.code_lines = len(index.text(estimated_code).split('\n'))
+    return compiled
+
+
+def _compile_table(table):
+    headers = tuple(th.get_text().strip() for th in table.find_all('th'))
+    rows = []
+    for tr in table.find_all('tr'):
+        cells = tuple(td.get_text().strip() for td in tr.find_all('td'))
+        if cells:
+            rows.append(cells)
+    return TableBlock(headers, tuple(rows))
+
+
+def _compile_list(list_elem, index):
+    text_before = ''
+    for sibling in list_elem.previous_siblings:
+        if isinstance(sibling, str) and sibling.strip():
+            text_before += sibling.strip() + ' '
+        elif hasattr(sibling, 'get_text'):
+            text_before += index.text(sibling) + ' '
+    items = tuple(index.text(item) for item in index.find_all(list_elem, 'li'))
+    return ListBlock(list_elem.name == 'ol', text_before, items)
+
+
+def _inherited_color(element, color_of):
+    """
+    Color of a heading or paragraph: its own color class, else its parent
+    div's, else its grandparent div's (None when none of them has one)
+    """
+    color = color_of(element)
+    if color == WHITE:
+        parent_div = element.find_parent('div')
+        if parent_div:
+            color = color_of(parent_div)
+            if color == WHITE:
+                grandparent_div = parent_div.find_parent('div')
+                if grandparent_div:
+                    color = color_of(grandparent_div)
+    return None if color == WHITE else color
+
+
+def dump_slides(slides):
+    """
+    Convert compiled slides to nested lists of strings and numbers for JSON
+
+    Args:
+        slides: Slide objects from compile_slides
+
+    Returns:
+        list: Data that load_slides turns back into equal slides
+    """
+    return [_dump_slide(slide) for slide in slides]
+
+
+def load_slides(data):
+    """Rebuild Slide objects from dump_slides output"""
+    return [_load_slide(item) for item in data]
+
+
+def _dump_color(color):
+    return list(color) if color is not None else None
+
+
+def _load_color(data):
+    return RGBColor(*data) if data is not None else None
+
+
+def _dump_text_block(block):
+    return [block.tag, block.text, _dump_color(block.color)] if block is not None else None
+
+
+def _load_text_block(data):
+    return TextBlock(data[0], data[1], _load_color(data[2])) if data is not None else None
+
+
+def _dump_rows(rows):
+    """Rows in order; nested rows are stored as positions in the same list"""
+    positions = {id(row): position for position, row in enumerate(rows)}
+    return [[
+        row.text, row.text_length, _dump_color(row.color),
+        [[img.src, img.alt, img.width, img.height] for img in row.images],
+        [positions[id(nested)] for nested in row.rows],
+        [_dump_text_block(header) for header in row.headers],
+        [_dump_text_block(para) for para in row.paragraphs],
+        [list(row.table.headers), [list(cells) for cells in row.table.rows]] if row.table else None,
+        [row.list.ordered, row.list.text_before, list(row.list.items)] if row.list else None,
+        _dump_text_block(row.code),
+        row.table_rows, row.list_items, row.code_lines,
+        row.header_text, row.paragraph_text, row.other_text,
+    ] for row in rows]
+
+
+def _load_rows(data):
+    rows = []
+    for item in data:
+        row = Row(item[0], item[1], _load_color(item[2]), tuple(ImageRef(*img) for img in item[3]))
+        row.headers = tuple(_load_text_block(header) for header in item[5])
+        row.paragraphs = tuple(_load_text_block(para) for para in item[6])
+        row.table = TableBlock(tuple(item[7][0]), tuple(tuple(cells) for cells in item[7][1])) if item[7] else None
+        row.list = ListBlock(item[8][0], item[8][1], tuple(item[8][2])) if item[8] else None
+        row.code = _load_text_block(item[9])
+        row.table_rows, row.list_items, row.code_lines = item[10], item[11], item[12]
+        row.header_text, row.paragraph_text, row.other_text = item[13], item[14], item[15]
+        rows.append(row)
+    for row, item in zip(rows, data):
+        row.rows = tuple(rows[position] for position in item[4])
+    return rows
+
+
+def _dump_column(column):
+    return [column.title, _dump_rows(column.rows)] if column is not None else None
+
+
+def _load_column(data):
+    return Column(data[0], _load_rows(data[1])) if data is not None else None
+
+
+def _dump_slide(slide):
+    return [
+        slide.title, _dump_color(slide.color), slide.text, list(slide.image_srcs),
+        _dump_rows(slide.rows), _dump_rows([slide.body]) if slide.body else None,
+        _dump_column(slide.left), _dump_column(slide.right), _dump_rows(slide.standalone),
+    ]
+
+
+def _load_slide(data):
+    return Slide(
+        title=data[0], color=_load_color(data[1]), text=data[2], image_srcs=tuple(data[3]),
+        rows=_load_rows(data[4]), body=_load_rows(data[5])[0] if data[5] else None,
+        left=_load_column(data[6]), right=_load_column(data[7]), standalone=tuple(_load_rows(data[8])),
+    )
@@ -0,0 +1,273 @@
+import re
+
+# Optional - without tinycss2 only the .class rules are picked out of the CSS with regexes
+try:
+    import tinycss2
+except ImportError:
+    tinycss2 = None
+
+# Combinators between the compound selectors of a complex selector
+DESCENDANT = ' '
+CHILD = '>'
+
+
+class Rule:
+    """
+    One selector of a style rule, with the declarations of that rule
+
+    The selector is a list of (combinator, compound) pairs from left to right;
+    a compound is (tag, id, classes), where tag and id may be None. The first
+    combinator is always None.
+    """
+    __slots__ = ('selector', 'specificity', 'order', 'declarations')
+
+    def __init__(self, selector, order, declarations):
+        self.selector = selector
+        self.order = order
+        self.declarations = declarations
+        # (ids, classes, tags) - compared as a tuple, like CSS does
+        self.specificity = (
+            sum(1 for _, (_, element_id, _) in selector if element_id),
+            sum(len(classes) for _, (_, _, classes) in selector),
+            sum(1 for _, (tag, _, _) in selector if tag),
+        )
+
+    def matches(self, element):
+        """Check the whole selector against element and its ancestors"""
+        if not _compound_matches(self.selector[-1][1], element):
+            return False
+        return _ancestors_match(self.selector, len(self.selector) - 1, element)
+
+
+class Stylesheet:
+    """
+    The CSS of a document, compiled into rules indexed by selector
+
+    Each rule is filed under the id, else a class, else the tag of the
+    element its selector targets, so the rules that can apply to an element
+    are found with a few dictionary lookups instead of a scan of the whole
+    stylesheet. style_for() cascades the matching declarations by
+    !important, specificity and source order. Selectors are compound
+    selectors (tag, #id, .class, *) joined by descendant or child
+    combinators; rules with any other selector are skipped.
+
+    Args:
+        css_texts: Contents of the document's <style> tags, in order
+    """
+
+    def __init__(self, css_texts=()):
+        self.rules = []
+        self._by_id = {}
+        self._by_class = {}
+        self._by_tag = {}
+        self._universal = []
+        # Without combinators an element's style only depends on its own tag, id and classes
+        self._has_combinators = False
+        self._styles = {}
+        for css in css_texts:
+            for selector, declarations in _parse_rules(css):
+                self._add(Rule(selector, len(self.rules), declarations))
+
+    def _add(self, rule):
+        self.rules.append(rule)
+        if len(rule.selector) > 1:
+            self._has_combinators = True
+        tag, element_id, classes = rule.selector[-1][1]
+        if element_id:
+            self._by_id.setdefault(element_id, []).append(rule)
+        elif classes:
+            self._by_class.setdefault(min(classes), []).append(rule)
+        elif tag:
+            self._by_tag.setdefault(tag, []).append(rule)
+        else:
+            self._universal.append(rule)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def candidates(self, element):
+        """Rules filed under the element's id, classes or tag - a superset of those that match"""
+        element_id = element.get('id')
+        found = list(self._by_id.get(element_id, ())) if element_id else []
+        for class_name in _classes_of(element):
+            found.extend(self._by_class.get(class_name, ()))
+        found.extend(self._by_tag.get(element.name, ()))
+        found.extend(self._universal)
+        return found
+
+    def style_for(self, element):
+        """
+        Computed declarations of element
+
+        Args:
+            element: BeautifulSoup tag
+
+        Returns:
+            dict: Property name -> value of every declaration that applies
+                (shared between elements with the same style - do not modify)
+        """
+        if not self.rules:
+            return {}
+        key = None
+        if not self._has_combinators:
+            key = (element.name, element.get('id'), tuple(_classes_of(element)))
+            style = self._styles.get(key)
+            if style is not None:
+                return style
+
+        declarations = []
+        for rule in self.candidates(element):
+            if rule.matches(element):
+                for position, (name, value, important) in enumerate(rule.declarations):
+                    declarations.append(((important, rule.specificity, rule.order, position), name, value))
+        declarations.sort(key=lambda declaration: declaration[0])
+        style = {name: value for _, name, value in declarations}
+
+        if key is not None:
+            self._styles[key] = style
+        return style
+
+
+def compile_stylesheet(soup):
+    """
+    Compile the <style> tags of a document - see Stylesheet
+
+    Args:
+        soup: Parsed HTML document
+
+    Returns:
+        Stylesheet: The document's rules, indexed for lookups
+    """
+    return Stylesheet(style_tag.string for style_tag in soup.find_all('style') if style_tag.string)
+
+
+def _classes_of(element):
+    classes = element.get('class', [])
+    if isinstance(classes, str):
+        classes = classes.split()
+    return classes
+
+
+def _compound_matches(compound, element):
+    tag, element_id, classes = compound
+    if tag and element.name != tag:
+        return False
+    if element_id and element.get('id') != element_id:
+        return False
+    return not classes or classes.issubset(_classes_of(element))
+
+
+def _ancestors_match(selector, index, element):
+    """Match selector[:index] against the ancestors of element (selector[index] matched element)"""
+    if index == 0:
+        return True
+    combinator = selector[index][0]
+    compound = selector[index - 1][1]
+    parent = element.parent
+    while parent is not None and parent.name != '[document]':
+        if _compound_matches(compound, parent) and _ancestors_match(selector, index - 1, parent):
+            return True
+        if combinator == CHILD:
+            return False
+        parent = parent.parent
+    return False
+
+
+def _parse_rules(css):
+    """(selector, declarations) for every supported selector of every style rule in css"""
+    if tinycss2 is None:
+        yield from _parse_rules_with_regex(css)
+        return
+
+    for node in tinycss2.parse_stylesheet(css, skip_comments=True, skip_whitespace=True):
+        if node.type != 'qualified-rule':
+            # At-rules (@media, @font-face, ...) and parse errors
+            continue
+        declarations = [
+            (declaration.lower_name, tinycss2.serialize(declaration.value).strip(), declaration.important)
+            for declaration in tinycss2.parse_declaration_list(node.content, skip_comments=True, skip_whitespace=True)
+            if declaration.type == 'declaration'
+        ]
+        if not declarations:
+            continue
+        for selector in _parse_selector_list(node.prelude):
+            yield selector, declarations
+
+
+def _parse_selector_list(tokens):
+    """Split a rule's prelude on commas and parse each selector, leaving out unsupported ones"""
+    selector_tokens = []
+    for token in list(tokens) + [None]:
+        if token is None or (token.type == 'literal' and token.value == ','):
+            selector = _parse_selector(selector_tokens)
+            if selector:
+                yield selector
+            selector_tokens = []
+        else:
+            selector_tokens.append(token)
+
+
+def _parse_selector(tokens):
+    """Parse the tokens of one selector into (combinator, compound) pairs, or None if unsupported"""
+    selector = []
+    combinator = None
+    tag = element_id = None
+    classes = set()
+    # Whether the current compound has any part yet
+    started = False
+    expect_class = False
+
+    def finish_compound():
+        selector.append((combinator, (tag, element_id, frozenset(classes))))
+
+    for token in tokens:
+        if expect_class:
+            if token.type != 'ident':
+                return None
+            classes.add(token.value)
+            expect_class = False
+            started = True
+        elif token.type == 'whitespace':
+            if started:
+                finish_compound()
+                combinator, tag, element_id, classes, started = DESCENDANT, None, None, set(), False
+        elif token.type == 'ident' and not started:
+            tag = token.lower_value
+            started = True
+        elif token.type == 'hash' and token.is_identifier:
+            element_id = token.value
+            started = True
+        elif token.type == 'literal' and token.value == '.':
+            expect_class = True
+        elif token.type == 'literal' and token.value == '*' and not started:
+            started = True
+        elif token.type == 'literal' and token.value == CHILD:
+            if started:
+                finish_compound()
+            elif not selector:
+                return None
+            combinator, tag, element_id, classes, started = CHILD, None, None, set(), False
+        else:
+            # Attribute selectors, pseudo-classes, sibling combinators, ...
+            return None
+
+    if expect_class:
+        return None
+    if started:
+        finish_compound()
+    elif selector and combinator == CHILD:
+        return None
+    return selector or None
+
+
+def _parse_rules_with_regex(css):
+    """Fallback without tinycss2: only '.class { ... }' rules"""
+    for class_name, body in re.findall(r'\.([^\s{]+)\s*{([^}]+)}', css):
+        declarations = []
+        for name, value in re.findall(r'([^:;]+):\s*([^;]+);?', body):
+            value = value.strip()
+            important = value.lower().endswith('!important')
+            if important:
+                value = value[:-len('!important')].strip()
+            declarations.append((name.strip().lower(), value, important))
+        yield [(None, (None, None, frozenset([class_name])))], declarations